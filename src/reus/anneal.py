@@ -0,0 +1,126 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Anytime layout optimizer by simulated annealing, for oceans too large for exact search
+"""
+from __future__ import annotations
+
+import logging
+import math
+import random
+import time
+
+import typing_extensions as t
+
+from . import model as m
+from . import optimizer
+from . import util as u
+
+__all__ = [
+    "anneal",
+]
+
+log = logging.getLogger(__name__)
+
+SAMPLES = 30  # Random moves to estimate the starting temperature
+COOLING = 1000  # Ratio of starting and final temperatures
+
+
+def anneal(
+    pool: t.Iterable[m.TSource],
+    size: int | None = None,
+    village: int = 6,
+    seconds: float | None = 1.0,
+    steps: int | None = None,
+    seed: int | None = None,
+    report: t.Callable[[optimizer.Solution], None] | None = None,
+) -> optimizer.Solution:
+    """Best layout found within a time budget, or a number of steps, by village Prosperity
+
+    Each step swaps 2 tiles or, if some sources are left out, replaces a tile by one of
+    them, scored by World.update(), so only tiles near the changed ones are re-evaluated.
+    Worse layouts are accepted with a probability decreasing over time, to escape local
+    optima. Report, if any, is called with the best solution every time it improves.
+    Temperature depends on the elapsed fraction of the budget, so a seed gives the same
+    result only if the budget is just a number of steps, with no seconds.
+    """
+    sources = list(pool)
+    size = len(sources) if size is None else size
+    if seconds is None and steps is None:
+        raise u.ReusError("A budget of seconds, steps or both is required")
+    if not 0 < size <= len(sources):
+        raise u.ReusError(
+            "Ocean size must be between 1 and the number of sources (%s): %s",
+            len(sources),
+            size,
+        )
+    rng = random.Random(seed)
+    rng.shuffle(sources)
+    world = m.World(sources[:size])
+    spare = sources[size:]  # Sources left out of the layout
+    current = world.total(until=village).prosperity
+    best = optimizer.Solution(tuple(sources[:size]), world.total(until=village))
+
+    def move() -> tuple[dict[int, m.TSource], int | None] | None:
+        """Random changes to the layout, and the spare source they use, if any"""
+        tile = rng.randrange(size)
+        cls = type(world.source(tile))
+        if spare and rng.random() < len(spare) / len(sources):
+            index = rng.randrange(len(spare))
+            return ({tile: spare[index]}, index) if spare[index] is not cls else None
+        other = rng.randrange(size)
+        new = type(world.source(other))
+        return ({tile: new, other: cls}, None) if new is not cls else None
+
+    def apply(changes: dict[int, m.TSource], index: int | None) -> int:
+        """Change the layout, returning the old sources of the changed tiles in spare"""
+        if index is not None:
+            (tile,) = changes
+            spare[index] = type(world.source(tile))
+        return world.update(changes, until=village)[1].prosperity
+
+    # Starting temperature accepts a typical worsening move with a probability of 1/e
+    deltas = []
+    for _ in range(SAMPLES):
+        change = move()
+        if change is None:
+            continue
+        changes, index = change
+        undo = {tile: type(world.source(tile)) for tile in changes}
+        deltas.append(abs(apply(changes, index) - current))
+        apply(undo, index)
+        best.evaluated += 1
+    start = max(sum(deltas) / len(deltas), 1.0) if deltas else 1.0
+
+    began = time.perf_counter()
+    step = 0
+    while True:
+        progress = 0.0
+        if seconds is not None:
+            progress = (time.perf_counter() - began) / seconds if seconds > 0 else 1
+        if steps is not None:
+            progress = max(progress, step / steps) if steps > 0 else 1
+        if progress >= 1:
+            break
+        step += 1
+        change = move()
+        if change is None:
+            continue
+        changes, index = change
+        undo = {tile: type(world.source(tile)) for tile in changes}
+        score = apply(changes, index)
+        best.evaluated += 1
+        temperature = start * COOLING**-progress
+        if score >= current or rng.random() < math.exp((score - current) / temperature):
+            current = score
+            if score > best.prosperity:
+                best.layout = tuple(type(_) for _ in world.sources)
+                best.total = world.total(until=village)
+                log.debug("Step %s, best so far: %s", step, best.prosperity)
+                if report is not None:
+                    report(best)
+        else:
+            apply(undo, index)
+    log.debug("Scored %s layouts in %s steps", best.evaluated, step)
+    return best
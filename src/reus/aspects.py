@@ -0,0 +1,105 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Aspect allocation: best slots for a set of aspects, by their yields on the village
+"""
+from __future__ import annotations
+
+import dataclasses
+import logging
+
+import typing_extensions as t
+
+from . import bounds
+from . import model as m
+
+__all__ = [
+    "TAspect",
+    "Allocation",
+    "allocate",
+]
+
+log = logging.getLogger(__name__)
+
+TAspect: t.TypeAlias = t.Type[m.Aspect]
+Used: t.TypeAlias = t.Tuple[int, ...]  # Count of aspects used, of each kind
+
+
+@dataclasses.dataclass
+class Allocation:
+    aspects: dict[int, tuple[TAspect, ...]] = dataclasses.field(default_factory=dict)
+    bonus: m.Yields = dataclasses.field(default_factory=m.Yields)  # On all village tiles
+    score: int = 0
+    states: int = 0  # Partial allocations kept by the dynamic program
+
+    @property
+    def prosperity(self) -> int:
+        return self.bonus.prosperity
+
+
+def allocate(
+    world: m.World,
+    aspects: t.Iterable[TAspect],
+    until: int = 6,
+    start: int = 0,
+    score: bounds.Score = bounds.prosperity,
+    natura: t.Mapping[int, int] | None = None,
+) -> Allocation:
+    """Best allocation of aspects to the slots of sources, by their score on the village
+
+    Each aspect is used at most once, and each source takes up to SLOTS of them. Score
+    must be linear, such as Prosperity or a single resource, so an aspect is worth its
+    score times the number of village tiles its source yields on, regardless of the other
+    aspects. Natura on each source, by tile, defaults to the one from the world.
+
+    Solved as a multiple-choice knapsack: slot by slot, keeping for each count of aspects
+    used of each kind only the best allocation so far, so its cost depends on the number
+    of such counts, not on the number of all possible allocations.
+    """
+    pool = list(aspects)
+    kinds = list(dict.fromkeys(pool))
+    capacity = tuple(pool.count(_) for _ in kinds)
+
+    # Sources yielding on the village, their slots and the worth of each aspect kind
+    slots: list[tuple[int, list[int]]] = []
+    bonuses: dict[int, list[m.Yields]] = {}
+    for source in world.sources:
+        tile = source.tile
+        coverage = sum(start <= _ < until for _ in source.all_yields(relative=False))
+        if not coverage:
+            continue
+        value = source.natura if natura is None else natura.get(tile, 0)
+        bonuses[tile] = [coverage * _.bonus(value) for _ in kinds]
+        worth = [score(_) for _ in bonuses[tile]]
+        slots.extend((tile, worth) for _ in range(source.SLOTS))
+
+    # Best score of each count of used aspects, and the choices leading to it
+    best: dict[Used, int] = {(0,) * len(kinds): 0}
+    choices: list[dict[Used, tuple[Used, int]]] = []
+    states = 0
+    for tile, worth in slots:
+        step: dict[Used, int] = dict(best)  # Leaving the slot empty
+        chosen: dict[Used, tuple[Used, int]] = {_: (_, -1) for _ in best}
+        for used, value in best.items():
+            for index, gain in enumerate(worth):
+                if used[index] == capacity[index] or gain <= 0:
+                    continue
+                state = used[:index] + (used[index] + 1,) + used[index + 1 :]
+                if state not in step or value + gain > step[state]:
+                    step[state] = value + gain
+                    chosen[state] = (used, index)
+        best = step
+        choices.append(chosen)
+        states += len(best)
+
+    used = max(best, key=best.__getitem__)
+    allocation = Allocation(score=best[used], states=states)
+    for (tile, _), chosen in zip(reversed(slots), reversed(choices)):
+        used, index = chosen[used]
+        if index >= 0:
+            allocation.aspects[tile] = (kinds[index], *allocation.aspects.get(tile, ()))
+            allocation.bonus += bonuses[tile][index]
+    allocation.aspects = dict(sorted(allocation.aspects.items()))
+    log.debug("Allocated %s aspects, keeping %s states", len(pool), states)
+    return allocation
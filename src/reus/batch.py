@@ -0,0 +1,118 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Streaming batch evaluation of layouts, one per line, to JSON Lines
+
+Each line is a layout as in reus-fish-calculator, such as: @ Seabass Clown Parrot ] Mack
+Blank lines and lines starting with # are skipped. Lines are read, evaluated and written
+one at a time, so memory does not depend on the number of layouts, only on the size of
+the cache of recent layouts.
+"""
+from __future__ import annotations
+
+import json
+import logging
+
+import typing_extensions as t
+
+from . import memo
+from . import model as m
+from . import notation
+from . import util as u
+
+if t.TYPE_CHECKING:
+    from . import store as s
+
+__all__ = [
+    "evaluate",
+    "result",
+    "results",
+    "run",
+]
+
+log = logging.getLogger(__name__)
+
+COMMENT = "#"
+
+
+def evaluate(
+    layout: t.Sequence[m.TSource],
+    until: int,
+    start: int = 0,
+    cache: memo.LayoutCache | None = None,
+) -> dict[str, t.Any]:
+    """Yields of each village tile, their total and its prosperity, as JSON-ready data"""
+    if cache is None:
+        cache = memo.LayoutCache(maxsize=0)
+    village, total = cache.village(layout, until, start)
+    return result(layout, until, start, village, total)
+
+
+def result(
+    layout: t.Sequence[m.TSource],
+    until: int,
+    start: int,
+    village: t.Sequence[m.Yields],
+    total: m.Yields,
+) -> dict[str, t.Any]:
+    """JSON-ready data of an evaluated village, as evaluate()"""
+    return {
+        "layout": [_.__name__ for _ in layout],
+        "start": start,
+        "until": until,
+        "tiles": [vars(_) for _ in village],
+        "total": vars(total),
+        "prosperity": total.prosperity,
+    }
+
+
+def results(
+    lines: t.Iterable[str],
+    village_range: int = 6,
+    patch: bool = False,
+    cache_size: int = memo.MAXSIZE,
+    store: s.Store | None = None,
+) -> t.Iterator[dict[str, t.Any]]:
+    """Evaluation of each layout line, or its error, lazily. Both have their line number
+
+    Village range is used for layouts without a village end marker. Repeated and
+    mirrored layouts are evaluated once, while in a cache of up to cache_size layouts,
+    or ever if they are in the persistent store.
+    """
+    cache = memo.LayoutCache(maxsize=cache_size, patch=patch, store=store)
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text or text.startswith(COMMENT):
+            continue
+        try:
+            layout, start, until = notation.parse(text.split())
+            start = start or 0
+            evaluated = evaluate(
+                layout,
+                until=start + village_range if until is None else until,
+                start=start,
+                cache=cache,
+            )
+        except u.ReusError as e:
+            log.warning("Line %s: %s", number, e)
+            yield {"line": number, "error": str(e)}
+            continue
+        yield {"line": number, **evaluated}
+
+
+def run(
+    infile: t.TextIO,
+    outfile: t.TextIO,
+    village_range: int = 6,
+    patch: bool = False,
+    cache_size: int = memo.MAXSIZE,
+    store: s.Store | None = None,
+) -> int:
+    """Evaluate all layouts in a file, writing one JSON line each. Return the count"""
+    count = 0
+    lines = results(infile, village_range, patch, cache_size, store)
+    for count, item in enumerate(lines, 1):
+        outfile.write(json.dumps(item, separators=(",", ":")))
+        outfile.write("\n")
+    return count
@@ -0,0 +1,252 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Benchmarks of World evaluation across ocean sizes and species mixes, as JSON
+"""
+from __future__ import annotations
+
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import timeit
+
+import typing_extensions as t
+
+from . import gamedata as g
+from . import model as m
+from . import util as u
+
+__all__ = [
+    "BENCHMARKS",
+    "MIXES",
+    "SIZES",
+    "layout",
+    "calibrate",
+    "run",
+    "cli",
+]
+
+log = logging.getLogger(__name__)
+
+SIZES: tuple[int, ...] = (9, 30, 100, 1000)
+
+# Species and their relative frequency, as in actual oceans
+MIXES: dict[str, dict[m.TSource, int]] = {
+    "early": {
+        g.Mackerel: 2,
+        g.Clownfish: 2,
+        g.Parrotfish: 2,
+        g.Seabass: 2,
+        g.Tuna: 1,
+    },
+    "great": {
+        g.GreatMackerel: 1,
+        g.GreatClownfish: 2,
+        g.GreatParrotfish: 2,
+        g.GreatSeabass: 2,
+        g.GreatTuna: 2,
+        g.Marlin: 1,
+        g.Anglerfish: 1,
+    },
+    "late": {
+        g.SuperiorClownfish: 2,
+        g.SuperiorParrotfish: 2,
+        g.SuperiorSeabass: 2,
+        g.GreatMarlin: 2,
+        g.BlueWhale: 1,
+        g.WhiteShark: 1,
+        g.Dolphin: 1,
+    },
+}
+
+Benchmark: t.TypeAlias = t.Callable[[m.World], t.Callable[[], object]]
+
+
+def _all_yields(world: m.World) -> t.Callable[[], object]:
+    """World.all_yields() of a fresh layout"""
+
+    def bench() -> object:
+        world.invalidate()
+        return world.all_yields()
+
+    return bench
+
+
+def _nearby_yields(world: m.World) -> t.Callable[[], object]:
+    """World.nearby_yields() of a source in an evaluated layout"""
+    source = world.source(len(world.sources) // 2)
+    world.all_yields()
+    return lambda: world.nearby_yields(source, g.Fish, 2)
+
+
+def _source_yields(world: m.World) -> t.Callable[[], object]:
+    """Source.yields of a single source in a fresh layout"""
+    source = world.source(len(world.sources) // 2)
+
+    def bench() -> object:
+        world.engine.clear()
+        return source.yields
+
+    return bench
+
+
+def _yields_add(world: m.World) -> t.Callable[[], object]:
+    """Yields + Yields"""
+    a, b = world.source(0).yields, world.source(len(world.sources) - 1).yields
+    return lambda: a + b
+
+
+def _yields_sum(world: m.World) -> t.Callable[[], object]:
+    """Yields.sum() of all tiles"""
+    tiles = list(world.tile_yields().values())
+    return lambda: m.Yields.sum(tiles)
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    "all_yields": _all_yields,
+    "nearby_yields": _nearby_yields,
+    "source_yields": _source_yields,
+    "yields_add": _yields_add,
+    "yields_sum": _yields_sum,
+}
+
+
+def layout(size: int, mix: str, seed: int = 0) -> list[m.TSource]:
+    """Random layout of a given size and species mix, the same for the same seed"""
+    species = MIXES[mix]
+    rng = random.Random(f"{seed}-{mix}-{size}")
+    return rng.choices(list(species), weights=list(species.values()), k=size)
+
+
+def calibrate(timer: timeit.Timer, min_time: float) -> int:
+    """Number of calls taking at least min_time seconds, as in timeit.Timer.autorange()"""
+    number = 1
+    while True:
+        for factor in (1, 2, 5):
+            if timer.timeit(number * factor) >= min_time:
+                return number * factor
+        number *= 10
+
+
+def run(
+    benchmarks: t.Iterable[str] = BENCHMARKS,
+    sizes: t.Iterable[int] = SIZES,
+    mixes: t.Iterable[str] = MIXES,
+    repeat: int = 3,
+    min_time: float = 0.02,
+    seed: int = 0,
+) -> list[dict[str, t.Any]]:
+    """Best time per call of each benchmark, size and mix, in seconds
+
+    Each of the repeat timings makes enough calls to take at least min_time seconds.
+    """
+    results: list[dict[str, t.Any]] = []
+    for name in benchmarks:
+        for mix in mixes:
+            for size in sizes:
+                world = m.World(layout(size, mix, seed))
+                timer = timeit.Timer(BENCHMARKS[name](world))
+                number = calibrate(timer, min_time)
+                best = min(timer.repeat(repeat=repeat, number=number)) / number
+                log.info("%-14s %-6s %5d tiles: %10.3f us", name, mix, size, best * 1e6)
+                results.append(
+                    {
+                        "benchmark": name,
+                        "mix": mix,
+                        "size": size,
+                        "seconds": best,
+                        "number": number,
+                        "repeat": repeat,
+                    }
+                )
+    return results
+
+
+def cli(argv: t.Sequence[str]) -> None:
+    parser = u.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-b",
+        "--benchmark",
+        dest="benchmarks",
+        action="append",
+        choices=BENCHMARKS,
+        help="Benchmark to run, can be repeated. [Default: all]",
+    )
+    parser.add_argument(
+        "-s",
+        "--size",
+        dest="sizes",
+        action="append",
+        type=int,
+        metavar="SIZE",
+        help=f"Ocean size, can be repeated. [Default: {', '.join(map(str, SIZES))}]",
+    )
+    parser.add_argument(
+        "-m",
+        "--mix",
+        dest="mixes",
+        action="append",
+        choices=MIXES,
+        help="Species mix, can be repeated. [Default: all]",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        default=3,
+        type=int,
+        metavar="N",
+        help="Timing repetitions, the best one is reported. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "-t",
+        "--time",
+        dest="min_time",
+        default=0.02,
+        type=float,
+        metavar="SECONDS",
+        help="Minimum duration of each timing. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "--seed",
+        default=0,
+        type=int,
+        help="Seed for generated layouts. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        type=u.ArgumentParser.FileType("w"),
+        metavar="FILE",
+        help="JSON output file. [Default: stdout]",
+    )
+
+    args = parser.parse_args(argv[1:])
+    u.setup_logging(level=args.loglevel, fmt="%(levelname)-8s: %(message)s")
+    log.debug(args)
+
+    from .main import __version__
+
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": run(
+            benchmarks=args.benchmarks or BENCHMARKS,
+            sizes=args.sizes or SIZES,
+            mixes=args.mixes or MIXES,
+            repeat=args.repeat,
+            min_time=args.min_time,
+            seed=args.seed,
+        ),
+    }
+    json.dump(report, args.output, indent=2)
+    args.output.write("\n")
+    if args.output is not sys.stdout:
+        args.output.close()
@@ -0,0 +1,101 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Upper bounds of source yields and of partial layouts, to discard them without evaluating
+
+Built from the class bounds, Source.max_yields() and Source.max_range(), which in turn
+come from their constants, such as BASE, RANGE and the caps of each symbiosis.
+"""
+from __future__ import annotations
+
+import logging
+
+import typing_extensions as t
+
+from . import gamedata as g
+from . import model as m
+
+__all__ = [
+    "Score",
+    "prosperity",
+    "table",
+    "Bounds",
+]
+
+log = logging.getLogger(__name__)
+
+Score: t.TypeAlias = t.Callable[[m.Yields], int]  # Must not decrease when yields increase
+
+
+def prosperity(yields: m.Yields) -> int:
+    return yields.prosperity
+
+
+def table(
+    species: t.Iterable[m.TSource] | None = None, pool: m.Pool = None
+) -> dict[m.TSource, tuple[m.Yields, int]]:
+    """Upper bounds of yields and range of each species, among pool. Default all Fish"""
+    classes = m.subclasses(g.Fish) if species is None else list(dict.fromkeys(species))
+    return {cls: (cls.max_yields(pool), cls.max_range(pool)) for cls in classes}
+
+
+class Bounds:
+    """Upper bounds of the score on village tiles of sources from a pool, and of layouts
+
+    Village tiles are from 0 to village (exclusive). Score is Prosperity by default, and
+    can be any other, such as a single resource, as long as it is not decreasing.
+    """
+
+    def __init__(
+        self,
+        pool: t.Iterable[m.TSource],
+        village: int = 6,
+        size: int | None = None,
+        score: Score = prosperity,
+    ):
+        self.pool: list[m.TSource] = list(pool)
+        self.village: int = village
+        self.size: int = len(self.pool) if size is None else size
+        bounds = table(self.pool, self.pool)
+        self.yields: dict[m.TSource, m.Yields] = {k: v[0] for k, v in bounds.items()}
+        self.range: dict[m.TSource, int] = {k: v[1] for k, v in bounds.items()}
+        self.score: dict[m.TSource, int] = {k: score(v) for k, v in self.yields.items()}
+        # Yields and range of a source only depend on sources within a neighbour's range
+        self.reach: int = 1 + max(self.range.values(), default=0)
+
+    def coverage(self, tile: int, distance: int) -> int:
+        """Number of village tiles within a distance from a tile"""
+        return max(0, min(tile + distance, self.village - 1) - max(tile - distance, 0) + 1)
+
+    def source(self, cls: m.TSource, tile: int) -> int:
+        """Upper bound of the score a source yields on all village tiles"""
+        return self.score[cls] * self.coverage(tile, self.range[cls])
+
+    def partial(
+        self,
+        layout: t.Sequence[m.TSource],
+        remaining: t.Iterable[m.TSource],
+        settled: int = 0,
+        start: int = 0,
+    ) -> int:
+        """Upper bound of the score of any layout starting with a partial one
+
+        Sources from the start tile of the layout are bounded by their class, the ones
+        before it are the settled score, their exact contribution. Remaining sources, up
+        to size, are paired with the remaining tiles, best with best, as if all had the
+        widest range.
+        """
+        bound = settled + sum(
+            self.source(cls, tile) for tile, cls in enumerate(layout[start:], start)
+        )
+        remaining = list(remaining)
+        if not remaining:
+            return bound
+        distance = max(self.range[cls] for cls in remaining)
+        tiles = sorted(
+            (self.coverage(tile, distance) for tile in range(len(layout), self.size)),
+            reverse=True,
+        )
+        scores = sorted((self.score[cls] for cls in remaining), reverse=True)
+        return bound + sum(map(int.__mul__, scores, tiles))
@@ -0,0 +1,102 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Layout constraints, checked by the optimizer as it builds layouts, not afterwards
+"""
+from __future__ import annotations
+
+import dataclasses
+import logging
+
+import typing_extensions as t
+
+from . import model as m
+from . import util as u
+
+__all__ = [
+    "Constraints",
+]
+
+log = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class Constraints:
+    """What a layout must have, and must not
+
+    Pinned tiles have a fixed species, such as existing sources. Species counts have a
+    minimum and a maximum, so 0 makes a species unavailable. Forbidden pairs of species
+    can't be neighbours, in any order. Required yields are the minimum resources of every
+    source of a species, such as Yields(tech=10) for Anglerfish Legendary Proportions.
+    """
+
+    pinned: dict[int, m.TSource] = dataclasses.field(default_factory=dict)
+    minimum: dict[m.TSource, int] = dataclasses.field(default_factory=dict)
+    maximum: dict[m.TSource, int] = dataclasses.field(default_factory=dict)
+    forbidden: set[frozenset[m.TSource]] = dataclasses.field(default_factory=set)
+    required: dict[m.TSource, m.Yields] = dataclasses.field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return any((self.pinned, self.minimum, self.maximum, self.forbidden, self.required))
+
+    def forbid(self, cls: m.TSource, other: m.TSource) -> None:
+        self.forbidden.add(frozenset((cls, other)))
+
+    def validate(self, pool: t.Sequence[m.TSource], size: int) -> None:
+        """Raise ReusError if constraints can never be met by any layout of a pool"""
+        for tile, cls in self.pinned.items():
+            if not 0 <= tile < size:
+                raise u.ReusError("Pinned tile must be within the ocean (%s): %s", size, tile)
+        pinned = list(self.pinned.values())
+        need = 0
+        for cls in {*pinned, *self.minimum}:
+            least = max(pinned.count(cls), self.minimum.get(cls, 0))
+            if least > min(pool.count(cls), self.maximum.get(cls, size)):
+                raise u.ReusError("Not enough %s for the constraints: %s", cls.__name__, least)
+            need += least
+        if need > size:
+            raise u.ReusError("Pinned tiles and minimum counts exceed the ocean size: %s", size)
+        available = sum(min(pool.count(_), self.maximum.get(_, size)) for _ in set(pool))
+        if available < size:
+            raise u.ReusError("Maximum counts leave too few sources for the ocean: %s", size)
+
+    def allows(self, layout: t.Sequence[m.TSource], cls: m.TSource) -> bool:
+        """If a source may be appended to a partial layout"""
+        tile = len(layout)
+        if self.pinned.get(tile, cls) is not cls:
+            return False
+        if cls in self.maximum and layout.count(cls) >= self.maximum[cls]:
+            return False
+        return not (layout and frozenset((layout[-1], cls)) in self.forbidden)
+
+    def feasible(
+        self, layout: t.Sequence[m.TSource], counts: t.Mapping[m.TSource, int], size: int
+    ) -> bool:
+        """If a partial layout, with counts of sources left, can still meet all counts"""
+        ahead = [cls for tile, cls in self.pinned.items() if tile >= len(layout)]
+        need = 0
+        for cls in {*ahead, *self.minimum}:
+            least = max(self.minimum.get(cls, 0) - layout.count(cls), ahead.count(cls))
+            if least > counts.get(cls, 0):
+                return False
+            need += least
+        # Pinned tiles ahead may also count for the minimum, so each is counted once
+        return need <= size - len(layout)
+
+    def satisfied(self, source: m.Source) -> bool:
+        """If a source has the required yields of its species, if any"""
+        required = self.required.get(type(source))
+        return required is None or all(map(int.__ge__, source.yields, required))
+
+    def met(self, world: m.World) -> bool:
+        """If a complete layout meets all constraints"""
+        layout = [type(_) for _ in world.sources]
+        counts = {cls: layout.count(cls) for cls in {*self.minimum, *self.maximum}}
+        return (
+            all(layout[tile] is cls for tile, cls in self.pinned.items())
+            and all(counts[cls] >= least for cls, least in self.minimum.items())
+            and all(counts[cls] <= most for cls, most in self.maximum.items())
+            and not any(frozenset(_) in self.forbidden for _ in zip(layout, layout[1:]))
+            and all(map(self.satisfied, world.sources))
+        )
@@ -0,0 +1,191 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Evaluation engine: memoized evaluations and the dependency graph between them
+"""
+from __future__ import annotations
+
+import logging
+
+import typing_extensions as t
+
+from . import util as u
+
+__all__ = ["Evaluator"]
+
+log = logging.getLogger(__name__)
+
+T = t.TypeVar("T")
+Node: t.TypeAlias = t.Tuple[t.Hashable, t.Hashable]  # (owner, key), such as (Source, yields)
+
+MAX_ITERATIONS = 32  # Fixed-point iterations on each circular dependency
+
+
+class Evaluator:
+    """Memoized evaluations, such as yields of Sources, that may depend on each other
+
+    Evaluating a node evaluates all nodes it depends on first, depth-first, so acyclic
+    dependencies are evaluated exactly once each, in topological order. Circular ones,
+    such as a White Shark reading its own Danger, are detected as strongly connected
+    components (Tarjan) while evaluating, then iterated from a seed value until they
+    reach a fixed point, up to max_iterations times.
+
+    The dependency graph itself is only recorded if tracing, as it is not required for
+    evaluation and recording every read has a noticeable cost.
+    """
+
+    def __init__(self, max_iterations: int = MAX_ITERATIONS, trace: bool = False):
+        self.max_iterations: int = max_iterations
+        self.trace: bool = trace
+        self.values: dict[t.Hashable, dict[t.Hashable, t.Any]] = {}  # owner -> key -> value
+        self.graph: dict[Node, set[Node]] = {}  # Node -> nodes it read, if tracing
+        self._stack: list[Node] = []  # Nodes being evaluated
+        self._lows: list[int] = []  # Lowest stack position each of them depends on
+        self._index: dict[Node, int] = {}  # Position of nodes in stack
+        self._pending: dict[Node, tuple[int, t.Any]] = {}  # In a cycle: (low, value)
+        self._members: list[Node] = []  # Pending nodes, in evaluation order
+        self._estimates: dict[Node, t.Any] = {}  # Previous iteration in a cycle
+
+    def evaluate(
+        self,
+        owner: t.Hashable,
+        key: t.Hashable,
+        seed: t.Callable[[], T] | None,
+        func: t.Callable[..., T],
+        *args: t.Any,
+        **kwargs: t.Any,
+    ) -> T:
+        """Value of func(*args, **kwargs), memoized as key of owner
+
+        Seed is the starting value when the evaluation depends on itself. If None, such
+        circular dependencies are an error.
+        """
+        values = self.values.get(owner)
+        if self.trace and self._stack:
+            self.graph[self._stack[-1]].add((owner, key))
+        if values is not None and key in values:
+            value: T = values[key]
+            return value
+
+        node = (owner, key)
+        if node in self._index:
+            # Circular: read the previous iteration instead
+            self._depend(self._index[node])
+            if node not in self._estimates:
+                if seed is None:
+                    raise u.ReusError("Circular dependency on %s of %s", key, owner)
+                self._estimates[node] = seed()
+            value = self._estimates[node]
+            return value
+
+        if node in self._pending:
+            low, value = self._pending[node]
+            self._depend(low)
+            return value
+
+        value, low = self._compute(node, func, args, kwargs)
+        index = len(self._stack)
+        if low < index:
+            # Part of a cycle that is still being evaluated, so not final yet
+            self._depend(low)
+            self._pending[node] = (low, value)
+            self._members.append(node)
+            return value
+        if node in self._estimates or (
+            self._members and self._pending[self._members[-1]][0] >= index
+        ):
+            value = self._resolve(node, value, func, args, kwargs)
+        if values is None:
+            values = self.values.setdefault(owner, {})
+        values[key] = value
+        return value
+
+    def _depend(self, low: int) -> None:
+        if low < self._lows[-1]:
+            self._lows[-1] = low
+
+    def _compute(
+        self, node: Node, func: t.Callable[..., T], args: tuple[t.Any, ...], kwargs: t.Any
+    ) -> tuple[T, int]:
+        """Evaluate a node once, returning its value and the lowest position it depends on"""
+        index = len(self._stack)
+        self._stack.append(node)
+        self._lows.append(index)
+        self._index[node] = index
+        if self.trace:
+            self.graph[node] = set()
+        try:
+            value = func(*args, **kwargs)
+        except BaseException:
+            if not index:
+                self._pending.clear()
+                self._members.clear()
+                self._estimates.clear()
+            raise
+        finally:
+            self._stack.pop()
+            del self._index[node]
+            low = self._lows.pop()
+        return value, low
+
+    def _resolve(
+        self,
+        node: Node,
+        value: T,
+        func: t.Callable[..., T],
+        args: tuple[t.Any, ...],
+        kwargs: t.Any,
+    ) -> T:
+        """Iterate the strongly connected component rooted at a node to a fixed point"""
+        members = self._claim(node, value)
+        estimated = set(members)
+        for _ in range(self.max_iterations):
+            self._estimates.update(members)
+            value = self._compute(node, func, args, kwargs)[0]
+            current = self._claim(node, value)
+            estimated.update(current)
+            if current == members:
+                break
+            members = current
+        else:
+            log.warning(
+                "Circular dependency on %s of %s did not converge after %s iterations",
+                node[1],
+                node[0],
+                self.max_iterations,
+            )
+
+        for member in estimated:
+            self._estimates.pop(member, None)
+        for (owner, key), result in current.items():
+            self.values.setdefault(owner, {})[key] = result
+        return value
+
+    def _claim(self, node: Node, value: t.Any) -> dict[Node, t.Any]:
+        """Values of a root node and the pending ones after it, not claimed by inner roots"""
+        index = len(self._stack)
+        members = {node: value}
+        while self._members and self._pending[self._members[-1]][0] >= index:
+            member = self._members.pop()
+            members[member] = self._pending.pop(member)[1]
+        return members
+
+    def forget(self, owner: t.Hashable) -> None:
+        """Discard all values of an owner"""
+        for key in self.values.pop(owner, ()):
+            self.graph.pop((owner, key), None)
+
+    def clear(self) -> None:
+        """Discard all values"""
+        self.values.clear()
+        self.graph.clear()
+
+    def dependencies(self, owner: t.Hashable) -> set[t.Hashable]:
+        """Owners that any evaluated value of an owner depends on directly, if tracing"""
+        return {
+            other
+            for key in self.values.get(owner, ())
+            for other, _ in self.graph.get((owner, key), ())
+            if other is not owner
+        }
@@ -6,40 +6,424 @@ Fish layout and resources calculator
 """
 from __future__ import annotations
 
+import argparse
+import contextlib
+import logging
+
 import typing_extensions as t
 
+from . import anneal
+from . import aspects
+from . import constraints as c
 from . import model as m
+from . import optimizer
+from . import pareto
+from . import planner
+from . import scheduler
+from . import store
+from . import sweep
 from .gamedata import *
+from .notation import VILLAGE_END, VILLAGE_START, fish, lookup, parse
 from . import util as u
 
-__all__ = ["cli"]
+__all__ = ["cli", "fish", "parse"]
 
+log = logging.getLogger(__name__)
 
-def cli(argv: t.Sequence[str]) -> None:
-    try:
-        village_range = int(argv[1]) if len(argv) > 1 else 6
-    except ValueError as e:
-        raise u.ReusError("Usage: reus-fish-calculator [CITY_RANGE=6]") from e
-    world = m.World(
-        layout=(
-            Seabass,
-            Clownfish,
-            Parrotfish,
-            Tuna,
-            Parrotfish,
-            Tuna,
-            Seabass,
-            Mackerel,
-        )
-    )
-    resources = world.all_yields(until=village_range)
+DEFAULT_LAYOUT: tuple[m.TSource, ...] = (
+    Seabass,
+    Clownfish,
+    Parrotfish,
+    Tuna,
+    Parrotfish,
+    Tuna,
+    Seabass,
+    Mackerel,
+)
+
+
+ASPECTS: dict[str, aspects.TAspect] = {
+    cls.__name__.lower(): cls for cls in m.Aspect.__subclasses__()
+}
+
+
+def aspect(name: str) -> aspects.TAspect:
+    """Aspect class by its name or an unambiguous prefix of it, case-insensitive"""
+    return lookup(name, ASPECTS, "aspect")
+
+
+def report(world: m.World, village_range: int, patch: bool = False, start: int = 0) -> None:
+    if patch:
+        layers = scheduler.Scheduler(world, patch=True)
+        sources: t.Any = [(k.name, v) for k, v in layers.run().items()]
+        tiles = layers.tiles
+    else:
+        sources = world.sources
+        tiles = world.tile_yields()
+    resources = {k: v for k, v in tiles.items() if start <= k < start + village_range}
     total = m.Yields.sum(resources.values())
 
     print("Ocean Layout:")
-    u.printf(world.sources)
+    u.printf(sources)
 
     print(f"\nVillage resources, range = {village_range}:")
     u.printf(resources)
 
     print(f"\nTotal: {total}")
     print(f"Prosperity: {total.prosperity}")
+
+
+def report_sweep(world: m.World, village_range: int, patch: bool = False) -> None:
+    """Best village start for each range up to village_range, from a single evaluation"""
+    print(f"Best village start by range, up to {village_range}:")
+    best = sweep.Sweep(world, patch=patch).best(ranges=range(1, village_range + 1))
+    for village, (start, total) in best.items():
+        print(f"{village:3d}: start = {start:3d}, prosperity = {total.prosperity:4d}, {total}")
+
+
+def report_aspects(
+    world: m.World, village_range: int, names: t.Iterable[str], start: int = 0
+) -> None:
+    """Best slots for some aspects, by their Prosperity on the village"""
+    allocation = aspects.allocate(
+        world, map(aspect, names), until=start + village_range, start=start
+    )
+    print(f"Aspects, village range = {village_range}:")
+    for tile, allocated in allocation.aspects.items():
+        listed = ", ".join(_.__name__ for _ in allocated)
+        print(f"{tile:3d}: {world.source(tile).name:20} {listed}")
+    print(f"\nBonus: {allocation.bonus}")
+    print(f"Prosperity: {allocation.prosperity}")
+
+
+def report_plan(layout: t.Sequence[m.TSource], village_range: int) -> None:
+    """Best order of upgrading each fish to its next tier"""
+    plan = planner.plan(layout, village=village_range)
+    print(f"Upgrades, village range = {village_range}:")
+    steps = zip(plan.steps, plan.layouts(), plan.totals)
+    for step, (tile, upgraded, total) in enumerate(steps, 1):
+        print(
+            f"{step:3d}: tile {tile:3d} to {upgraded[tile].__name__:20}"
+            f" prosperity = {total.prosperity:4d}, {total}"
+        )
+    print(f"\nSum of Prosperity on all steps: {plan.prosperity}")
+
+
+def report_pareto(solutions: t.Sequence[optimizer.Solution]) -> None:
+    """Layouts on the Pareto frontier, one per line"""
+    print(f"Pareto frontier, {len(solutions)} layouts:")
+    for solution in solutions:
+        names = " ".join(_.__name__ for _ in solution.layout)
+        print(f"{solution.prosperity:4d}, {solution.total}: {names}")
+
+
+def cap(value: str) -> tuple[str, int]:
+    """RESOURCE=N argument of --cap"""
+    field, sep, limit = value.partition("=")
+    if not sep or field not in pareto.FIELDS or not limit.strip().lstrip("-").isdigit():
+        raise argparse.ArgumentTypeError(
+            f"must be RESOURCE=N, RESOURCE one of {', '.join(pareto.FIELDS)}: {value!r}"
+        )
+    return field, int(limit)
+
+
+def constraints(
+    pin: t.Iterable[str] = (),
+    least: t.Iterable[str] = (),
+    most: t.Iterable[str] = (),
+    apart: t.Iterable[str] = (),
+    require: t.Iterable[str] = (),
+) -> c.Constraints:
+    """Constraints from arguments such as 0=Tuna, Tuna=2, Tuna,Seabass and Angler.tech=10"""
+
+    def split(value: str, sep: str, syntax: str) -> tuple[str, str]:
+        key, found, rest = value.partition(sep)
+        if not (found and key and rest):
+            raise u.ReusError("Constraint must be %s: %r", syntax, value)
+        return key, rest
+
+    def number(value: str) -> int:
+        if not value.isdigit():
+            raise u.ReusError("Not a valid number: %r", value)
+        return int(value)
+
+    constraints = c.Constraints()
+    for value in pin:
+        tile, name = split(value, "=", "TILE=FISH")
+        constraints.pinned[number(tile)] = fish(name)
+    for value in least:
+        name, count = split(value, "=", "FISH=N")
+        constraints.minimum[fish(name)] = number(count)
+    for value in most:
+        name, count = split(value, "=", "FISH=N")
+        constraints.maximum[fish(name)] = number(count)
+    for value in apart:
+        name, other = split(value, ",", "FISH,FISH")
+        constraints.forbid(fish(name), fish(other))
+    for value in require:
+        name, rest = split(value, ".", "FISH.RESOURCE=N")
+        field, amount = split(rest, "=", "FISH.RESOURCE=N")
+        if field not in pareto.FIELDS:
+            raise u.ReusError("Resource must be one of %s: %r", pareto.FIELDS, field)
+        cls = fish(name)
+        required = constraints.required.get(cls, m.Yields())
+        constraints.required[cls] = required + m.Yields(**{field: number(amount)})
+    return constraints
+
+
+def cli(argv: t.Sequence[str]) -> None:
+    parser = u.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-r",
+        "--range",
+        dest="village_range",
+        default=6,
+        type=int,
+        metavar="RANGE",
+        help="Village range, from the first ocean tile or the village start marker."
+        " [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "-p",
+        "--patch",
+        default=False,
+        action="store_true",
+        help="Tuna and Anglerfish symbioses count all resources on neighbouring patches,"
+        " not only the ones produced by the neighbouring fish.",
+    )
+    parser.add_argument(
+        "-S",
+        "--sweep",
+        default=False,
+        action="store_true",
+        help="Report the best village start for every range up to RANGE.",
+    )
+    parser.add_argument(
+        "-A",
+        "--aspects",
+        nargs="+",
+        metavar="ASPECT",
+        help="Report the best slots for these aspects, such as SublimeHerd PotentHunt,"
+        " by their Prosperity on the village. Use the same name again for more of it.",
+    )
+    parser.add_argument(
+        "-U",
+        "--upgrade",
+        default=False,
+        action="store_true",
+        help="Plan the order of upgrading each fish to its next tier, such as Tuna to"
+        " GreatTuna, with the most Prosperity along the way.",
+    )
+    parser.add_argument(
+        "-O",
+        "--optimize",
+        default=False,
+        action="store_true",
+        help="Search for the arrangement of FISH with the highest Prosperity.",
+    )
+    parser.add_argument(
+        "-n",
+        "--size",
+        type=int,
+        metavar="SIZE",
+        help="Ocean size for --optimize, picking the best SIZE fish out of FISH."
+        " [Default: all FISH]",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        default=1,
+        type=int,
+        metavar="N",
+        help="Number of processes for --optimize, 0 for all CPUs. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "-a",
+        "--anneal",
+        type=float,
+        metavar="SECONDS",
+        help="Search for --optimize by simulated annealing for SECONDS, reporting the best"
+        " layout so far as it improves. For oceans too large for an exact search.",
+    )
+    parser.add_argument(
+        "--steps",
+        type=int,
+        metavar="N",
+        help="Search for --optimize by simulated annealing for N steps, or up to N steps"
+        " with --anneal. Unlike SECONDS, the same --seed then gives the same result.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed for --anneal and --steps, for reproducible moves."
+        " [Default: random]",
+    )
+    parser.add_argument(
+        "--pin",
+        default=[],
+        action="append",
+        metavar="TILE=FISH",
+        help="Fix a tile of --optimize arrangements to a fish, such as 0=Tuna for an existing"
+        " one on the first tile. Can be used multiple times, as all options below.",
+    )
+    parser.add_argument(
+        "--min",
+        dest="least",
+        default=[],
+        action="append",
+        metavar="FISH=N",
+        help="Have at least N of a fish in --optimize arrangements.",
+    )
+    parser.add_argument(
+        "--max",
+        dest="most",
+        default=[],
+        action="append",
+        metavar="FISH=N",
+        help="Have at most N of a fish in --optimize arrangements, 0 to leave it out.",
+    )
+    parser.add_argument(
+        "--apart",
+        default=[],
+        action="append",
+        metavar="FISH,FISH",
+        help="Never have these fish next to each other in --optimize arrangements.",
+    )
+    parser.add_argument(
+        "--require",
+        default=[],
+        action="append",
+        metavar="FISH.RESOURCE=N",
+        help="Have at least N of RESOURCE on every such fish in --optimize arrangements,"
+        " such as Angler.tech=10 for its Legendary Proportions.",
+    )
+    parser.add_argument(
+        "-P",
+        "--pareto",
+        default=False,
+        action="store_true",
+        help="Search for --optimize all arrangements of FISH not beaten by another one in"
+        " every resource, less Danger being better.",
+    )
+    parser.add_argument(
+        "--cap",
+        default=[],
+        action="append",
+        type=cap,
+        metavar="RESOURCE=N",
+        help="Discard --pareto arrangements with more than N of RESOURCE, such as"
+        " danger=5. Can be used multiple times.",
+    )
+    parser.add_argument(
+        "-s",
+        "--store",
+        metavar="DATABASE",
+        help="SQLite database file to save --optimize results, so the same search"
+        " is never made again.",
+    )
+    parser.add_argument(
+        nargs="*",
+        dest="fish",
+        metavar="FISH",
+        help="Ocean layout, or available fish for --optimize. Names can be abbreviated,"
+        f" such as Mack for Mackerel. Village tiles can be marked by {VILLAGE_START}"
+        f" before the first one and {VILLAGE_END} after the last one. A leading number"
+        " is the village range, as in --range. [Default: a sample layout]",
+    )
+
+    args = parser.parse_args(argv[1:])
+    u.setup_logging(level=args.loglevel, fmt="%(levelname)-8s: %(message)s")
+    log.debug(args)
+
+    if args.fish and args.fish[0].isdecimal():
+        # As in the original usage: reus-fish-calculator [CITY_RANGE]
+        args.village_range = int(args.fish.pop(0))
+    layout, start, until = parse(args.fish)
+    layout = layout or list(DEFAULT_LAYOUT)
+    start = start or 0
+    village_range = args.village_range if until is None else until - start
+    if args.upgrade:
+        if args.optimize or args.patch or start:
+            parser.error("--upgrade is not supported by --optimize, --patch or village start")
+        report_plan(layout, village_range)
+        return
+    if args.sweep:
+        if args.optimize:
+            parser.error("--sweep is not supported by --optimize")
+        report_sweep(m.World(layout), village_range, patch=args.patch)
+        return
+    if args.aspects:
+        if args.optimize or args.patch:
+            parser.error("--aspects is not supported by --optimize or --patch")
+        report_aspects(m.World(layout), village_range, args.aspects, start=start)
+        return
+    if not args.optimize:
+        report(m.World(layout), village_range, patch=args.patch, start=start)
+        return
+    if args.patch:
+        parser.error("--patch is not supported by --optimize")
+    if start:
+        parser.error(
+            f"Village must start at the first tile for --optimize, remove {VILLAGE_START}"
+        )
+
+    annealing = args.anneal is not None or args.steps is not None
+    rules = constraints(args.pin, args.least, args.most, args.apart, args.require)
+    if rules and annealing:
+        parser.error("Constraints are not supported by --anneal or --steps")
+    if args.pareto:
+        if annealing:
+            parser.error("--pareto is not supported by --anneal or --steps")
+        search = pareto.Pareto(
+            layout,
+            size=args.size,
+            village=village_range,
+            caps=dict(args.cap),
+            constraints=rules,
+        )
+        solutions = search.frontier()
+        log.info(
+            "Evaluated %s layouts, %s partial layouts pruned\n",
+            search.best.evaluated,
+            search.best.pruned,
+        )
+        report_pareto(solutions)
+        return
+    if args.cap:
+        parser.error("--cap requires --pareto")
+
+    if annealing:
+
+        def progress(best: optimizer.Solution) -> None:
+            names = " ".join(_.__name__ for _ in best.layout)
+            log.info("Best so far: %s, Prosperity %s: %s", best.total, best.prosperity, names)
+
+        solution = anneal.anneal(
+            layout,
+            size=args.size,
+            village=village_range,
+            seconds=args.anneal,
+            steps=args.steps,
+            seed=args.seed,
+            report=progress,
+        )
+        log.info("Evaluated %s layouts\n", solution.evaluated)
+        report(solution.world(), village_range)
+        return
+
+    with contextlib.ExitStack() as stack:
+        database = None if args.store is None else stack.enter_context(store.Store(args.store))
+        solution = optimizer.optimize(
+            layout,
+            size=args.size,
+            village=village_range,
+            jobs=args.jobs,
+            store=database,
+            constraints=rules,
+        )
+    log.info(
+        "Evaluated %s layouts, %s partial layouts pruned\n",
+        solution.evaluated,
+        solution.pruned,
+    )
+    report(solution.world(), village_range)
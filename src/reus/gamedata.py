@@ -9,6 +9,7 @@ from __future__ import annotations
 import logging
 
 from .model import *  # '*' also re-exports symbols
+from .model import Pool, SourceMatch, TSource, subclasses
 
 log = logging.getLogger(__name__)
 
@@ -42,6 +43,11 @@ class Mackerel(Fish):
     def range(self) -> int:
         return super().range + self.massive_school()
 
+    @classmethod
+    def max_range(cls, pool: Pool = None) -> int:
+        bonus: int = min(cls.SYMB.max, cls.SYMB.bonus * cls.others(pool, Mackerel))
+        return super().max_range(pool) + bonus
+
     def massive_school(self) -> int:
         """
         Massive School: +1 Range for each other Mackerel within Animal Range.
@@ -82,6 +88,11 @@ class Clownfish(Fish):
         """Coral Dweller: +2 Wealth if next to another Clownfish or Parrotfish."""
         return self.SYMB if self.nearby((Clownfish, Parrotfish)) else Yields()
 
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        bonus = cls.SYMB if cls.others(pool, (Clownfish, Parrotfish)) else Yields()
+        return super().max_yields(pool) + bonus
+
 
 class GreatClownfish(Clownfish):
     SLOTS = 2
@@ -111,6 +122,11 @@ class Parrotfish(Fish):
         """
         return self.SYMB * len(set(fish.kind for fish in self.within_range(Fish)))
 
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        kinds = min(2 * cls.max_range(pool), cls.other_kinds(pool, Fish))
+        return super().max_yields(pool) + cls.SYMB * kinds
+
 
 class GreatParrotfish(Parrotfish):
     SLOTS = 3
@@ -137,6 +153,11 @@ class Seabass(Fish):
         """Predator: +3 Food if there is a Mackerel or Clownfish within Animal Range."""
         return self.SYMB if self.within_range((Mackerel, Clownfish)) else Yields()
 
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        bonus = cls.SYMB if cls.others(pool, (Mackerel, Clownfish)) else Yields()
+        return super().max_yields(pool) + bonus
+
 
 class GreatSeabass(Seabass):
     SLOTS = 3
@@ -171,13 +192,18 @@ class Tuna(Fish):
             ).gold
             // self.GROWING_HUNTERS.per_gold
         ) * self.GROWING_HUNTERS.food_factor
-        log.info("tuna factor: %s", factor)
         return factor * Yields(food=1)
 
     def territorial(self) -> Yields:
         """Territorial: +3 Food if there is no other Tuna within Animal-Range."""
         return self.TERRITORIAL if not self.within_range(Tuna) else Yields()
 
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        gold = max_neighbours(cls, pool, (Clownfish, Parrotfish, Marlin)).gold
+        factor: float = (gold // cls.GROWING_HUNTERS.per_gold) * cls.GROWING_HUNTERS.food_factor
+        return super().max_yields(pool) + factor * Yields(food=1) + cls.TERRITORIAL
+
 
 class GreatTuna(Tuna):
     SLOTS = 5
@@ -210,6 +236,15 @@ class Marlin(Fish):
         """
         return self.HUGE_SPECIMEN * len(self.within_range(Parrotfish))
 
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        tiles = 2 * cls.max_range(pool)
+        return (
+            super().max_yields(pool)
+            + cls.VIGOROUS_SPECIMEN * min(tiles, cls.others(pool, Seabass))
+            + cls.HUGE_SPECIMEN * min(tiles, cls.others(pool, Parrotfish))
+        )
+
 
 class GreatMarlin(Marlin):
     SLOTS = 5
@@ -250,6 +285,13 @@ class Anglerfish(Fish):
         )
         return bonus
 
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        food = max_neighbours(cls, pool, (Mackerel, Seabass, Marlin)).food
+        factor: float = cls.WEIRD_DEEPS.tech_factor * (food // cls.WEIRD_DEEPS.per_food)
+        bonus: Yields = cls.LEGENDARY_PROPORTIONS.bonus
+        return super().max_yields(pool) + factor * Yields(tech=1) + bonus
+
 
 class GreatAnglerfish(Fish):
     SLOTS = 5
@@ -268,6 +310,11 @@ class BlueWhale(Fish):  # Well, not really a Fish...
     def range(self) -> int:
         return super().range + self.great_voyage()[1]
 
+    @classmethod
+    def max_range(cls, pool: Pool = None) -> int:
+        bonus: int = cls.GREAT_VOYAGE.range
+        return super().max_range(pool) + bonus
+
     @property
     def yields(self) -> Yields:
         return super().yields + self.great_voyage()[0] + self.majesty()
@@ -277,7 +324,7 @@ class BlueWhale(Fish):  # Well, not really a Fish...
         Great Voyage: +25 Food and +1 Range if neighboring patches have no Natural Sources.
         """
         return (
-            (Yields(food=25), 1)
+            (self.GREAT_VOYAGE.bonus, self.GREAT_VOYAGE.range)
             if not self.nearby((Mineral, Plant, Animal))
             else (Yields(), 0)
         )
@@ -286,12 +333,24 @@ class BlueWhale(Fish):  # Well, not really a Fish...
         """
         Majesty: +5 Awe and +5 Food for each Tuna, Seabass and Mackerel within Animal-Range.
         """
-        return Yields(awe=5, food=5) * len(self.within_range((Tuna, Seabass, Mackerel)))
+        return self.MAJESTY * len(self.within_range((Tuna, Seabass, Mackerel)))
+
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        tiles = 2 * cls.max_range(pool)
+        bonus: Yields = cls.GREAT_VOYAGE.bonus
+        return (
+            super().max_yields(pool)
+            + bonus
+            + cls.MAJESTY * min(tiles, cls.others(pool, (Tuna, Seabass, Mackerel)))
+        )
 
 
 class WhiteShark(Fish):
     SLOTS = 6
     BASE = Yields(food=5, gold=10)
+    DEEP_SEA_KILLER = Yields(danger=4)
+    HUNTED = Data(gold=30, per_danger=1)
 
     @property
     def yields(self) -> Yields:
@@ -301,19 +360,29 @@ class WhiteShark(Fish):
         """
         Deep Sea Killer: +4 Danger for each White Shark or Marlin within Animal-Range.
         """
-        return Yields(danger=4) * len(self.within_range((WhiteShark, Marlin)))
+        return self.DEEP_SEA_KILLER * len(self.within_range((WhiteShark, Marlin)))
 
     def hunted(self) -> Yields:
         """
         Hunted: +30 Wealth but -1 Wealth for each 1 Danger on this White Shark.
         """
-        return Yields(gold=30 - self.yields.danger)
+        return Yields(gold=self.HUNTED.gold - self.yields.danger // self.HUNTED.per_danger)
+
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        tiles = 2 * cls.max_range(pool)
+        return (
+            super().max_yields(pool)
+            + cls.DEEP_SEA_KILLER * min(tiles, cls.others(pool, (WhiteShark, Marlin)))
+            + Yields(gold=cls.HUNTED.gold)  # No Danger at all
+        )
 
 
 class Dolphin(Fish):  # Not a fish either...
     SLOTS = 7
     BASE = Yields(food=2, gold=2)
     SYMB = Yields(tech=5, awe=3)
+    POD = Yields(food=10, gold=15)
 
     @property
     def yields(self) -> Yields:
@@ -327,8 +396,27 @@ class Dolphin(Fish):  # Not a fish either...
         # Alternative since we parametrized it: return Parrotfish.barrier_dweller(self)
         return self.SYMB * len(set(fish.kind for fish in self.within_range(Fish)))
 
-    def pod(self):
+    def pod(self) -> Yields:
         """
         Pod: +10 Food and +15 Wealth if next to a Parrotfish or another Dolphin.
         """
-        return Yields(food=10, gold=15) if self.nearby((Parrotfish, Dolphin)) else Yields()
+        return self.POD if self.nearby((Parrotfish, Dolphin)) else Yields()
+
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        kinds = min(2 * cls.max_range(pool), cls.other_kinds(pool, Fish))
+        pod = cls.POD if cls.others(pool, (Parrotfish, Dolphin)) else Yields()
+        return super().max_yields(pool) + cls.SYMB * kinds + pod
+
+
+def max_neighbours(cls: TSource, pool: Pool, matching: SourceMatch) -> Yields:
+    """Upper bound of the yields of both neighbours of a source, if they match a type"""
+    if pool is None:
+        others = 2 * [_ for _ in subclasses(Source) if issubclass(_, matching)]
+    else:
+        others = list(pool)
+        if cls in others:
+            others.remove(cls)
+    bounds = [_.max_yields(pool) for _ in others if issubclass(_, matching)]
+    # Each resource on its own, as the 2 best neighbours may differ for each one
+    return Yields(*(sum(sorted(_, reverse=True)[:2]) for _ in zip(Yields(), *bounds)))
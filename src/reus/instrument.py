@@ -0,0 +1,188 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Instrumentation of evaluation hot paths: call counts, cumulative time and cache hits
+
+Disabled by default, and then nothing is changed. Enabling it wraps the instrumented
+functions in place, disabling it restores them. Enabled by --profile in all CLIs using
+util.ArgumentParser, or by setting the REUS_PROFILE environment variable to 1, true or yes.
+"""
+from __future__ import annotations
+
+import dataclasses
+import functools
+import logging
+import sys
+import time
+
+import typing_extensions as t
+
+from . import engine
+from . import gamedata as g
+from . import model as m
+from . import scheduler
+from . import util as u
+
+__all__ = [
+    "ENVIRON",
+    "Stats",
+    "symbioses",
+    "enable",
+    "disable",
+    "enabled",
+    "reset",
+    "stats",
+    "report",
+]
+
+log = logging.getLogger(__name__)
+
+ENVIRON = u.PROFILE_ENVIRON
+WORLD: tuple[str, ...] = ("tile", "nearby_sources", "nearby_yields", "all_yields")
+
+
+@dataclasses.dataclass
+class Stats:
+    calls: int = 0
+    cached: bool = False
+    hits: int = 0  # Calls answered by the cache, if cached
+    seconds: float = 0  # Cumulative time, including nested calls
+    active: int = 0  # Calls in progress, so recursion is timed only once
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.calls if self.calls else 0
+
+
+_stats: dict[str, Stats] = {}
+_originals: list[tuple[type, str, t.Any]] = []
+# Evaluations in progress, innermost last, by the evaluate() instrumenting each
+_evaluating: list[tuple[t.Callable[..., t.Any], engine.Evaluator, t.Hashable, t.Hashable]] = []
+
+
+def _timed(name: str, func: t.Callable[..., t.Any]) -> t.Callable[..., t.Any]:
+    stats = _stats.setdefault(name, Stats())
+
+    @functools.wraps(func)
+    def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+        stats.calls += 1
+        stats.active += 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.active -= 1
+            if not stats.active:
+                stats.seconds += time.perf_counter() - start
+
+    return wrapper
+
+
+def _evaluate(func: t.Callable[..., t.Any]) -> t.Callable[..., t.Any]:
+    """Instrumented Evaluator.evaluate(), by the name of the evaluated method
+
+    Overrides calling super() for the same evaluation, such as Scheduler's, count once.
+    """
+    timed: dict[t.Hashable, tuple[Stats, t.Callable[..., t.Any]]] = {}
+
+    @functools.wraps(func)
+    def wrapper(
+        self: engine.Evaluator,
+        owner: t.Hashable,
+        key: t.Hashable,
+        *args: t.Any,
+        **kwargs: t.Any,
+    ) -> t.Any:
+        if _evaluating:
+            caller, evaluator, parent, node = _evaluating[-1]
+            if caller is not func and evaluator is self and parent is owner and node == key:
+                return func(self, owner, key, *args, **kwargs)
+        method = key[0] if isinstance(key, tuple) else key
+        if method not in timed:
+            name = getattr(method, "__qualname__", str(method))
+            timed[method] = (_stats.setdefault(name, Stats(cached=True)), _timed(name, func))
+        stats, evaluate = timed[method]
+        if key in self.values.get(owner, ()):
+            stats.hits += 1
+        _evaluating.append((func, self, owner, key))
+        try:
+            return evaluate(self, owner, key, *args, **kwargs)
+        finally:
+            _evaluating.pop()
+
+    return wrapper
+
+
+def _patch(owner: type, name: str, wrapper: t.Callable[..., t.Any]) -> None:
+    _originals.append((owner, name, owner.__dict__[name]))
+    setattr(owner, name, wrapper)
+
+
+def symbioses(cls: m.TSource) -> list[str]:
+    """Names of the symbioses, and any other helper methods, declared by a Source class"""
+    api = set(dir(m.Animal))
+    return [
+        name
+        for name, attr in vars(cls).items()
+        if callable(attr) and not isinstance(attr, type) and not name.startswith("_")
+        if name not in api
+    ]
+
+
+def enable() -> None:
+    """Start instrumenting, if not already"""
+    if _originals:
+        return
+    for evaluator in (engine.Evaluator, scheduler.Scheduler):  # All evaluate() overrides
+        _patch(evaluator, "evaluate", _evaluate(evaluator.__dict__["evaluate"]))
+    for name in WORLD:
+        _patch(m.World, name, _timed(f"World.{name}", getattr(m.World, name)))
+    for cls in m.subclasses(g.Source):  # All of them are in gamedata
+        for name in symbioses(cls):
+            _patch(cls, name, _timed(f"{cls.__name__}.{name}", getattr(cls, name)))
+
+
+def disable() -> None:
+    """Stop instrumenting, restoring all original functions. Stats are kept"""
+    while _originals:
+        owner, name, original = _originals.pop()
+        setattr(owner, name, original)
+
+
+def enabled() -> bool:
+    return bool(_originals)
+
+
+def reset() -> None:
+    """Discard all stats"""
+    for item in _stats.values():
+        item.calls = item.hits = 0
+        item.seconds = 0
+
+
+def stats() -> dict[str, Stats]:
+    """Stats of all instrumented functions called at least once, most time-consuming first"""
+    return dict(
+        sorted(
+            ((k, v) for k, v in _stats.items() if v.calls),
+            key=lambda _: _[1].seconds,
+            reverse=True,
+        )
+    )
+
+
+def report(file: t.TextIO | None = None) -> None:
+    """Print a table of stats, by default to stderr"""
+    file = sys.stderr if file is None else file
+    print(
+        f"{'Function':40} {'Calls':>10} {'Hit rate':>8} {'Time (ms)':>10} {'Per call (us)':>13}",
+        file=file,
+    )
+    for name, item in stats().items():
+        hit_rate = f"{item.hit_rate:8.1%}" if item.cached else f"{'-':>8}"
+        print(
+            f"{name:40} {item.calls:10d} {hit_rate} {item.seconds * 1e3:10.1f}"
+            f" {item.seconds / item.calls * 1e6:13.2f}",
+            file=file,
+        )
@@ -6,56 +6,116 @@ Reus Game tools
 """
 from __future__ import annotations
 
+import contextlib
+import importlib
 import logging
 import os.path
 import sys
-import typing_extensions as t
 
-from . import fishcalc
-from . import realstate
 from . import util as u
 
+# Only what every command needs is imported here, commands import the rest themselves,
+# so the ones not using game data start fast. See tests/startup.py
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing_extensions as t
+
 __version__ = "2023.9.19"
 
-ENTRY_POINTS: dict[str, t.Callable[[list[str]], None]] = {
-    "reus-fish-calculator": fishcalc.cli,
-    "reus-realstate": realstate.cli,
+# Command functions by executable name, as "module:function", imported when dispatched
+ENTRY_POINTS: dict[str, str] = {
+    "reus-fish-calculator": "fishcalc:cli",
+    "reus-realstate": "realstate:cli",
+    "reus-bench": "bench:cli",
+    "reus-serve": "serve:cli",
 }
+CACHE_SIZE = 2**16  # Same as memo.MAXSIZE, without importing it for --help or --version
 
 log: logging.Logger = logging.getLogger(__package__)
 
 
 def cli(argv: list[str] | None = None) -> None:
     """Command-line argument handling and logging setup"""
-    parser = u.ArgumentParser(description=__doc__, version=__version__)
+    parser = u.ArgumentParser(
+        description="Evaluate ocean layouts, one per line, writing results as JSON Lines",
+        version=__version__,
+    )
     parser.add_argument(
         nargs="?",
         default="-",
         dest="infile",
+        type=u.ArgumentParser.FileType("r"),
         metavar="INPUT_FILE",
-        help="Input file to import from. [Default: stdin]",
+        help="Input file to import from, one layout per line, such as"
+        " '@ Seabass Clown Parrot ] Mack'. [Default: stdin]",
     )
     parser.add_argument(
         "-o",
-        "--option",
-        dest="option",
+        "--output",
+        dest="outfile",
+        default="-",
+        type=u.ArgumentParser.FileType("w"),
+        metavar="FILE",
+        help="Output file. [Default: stdout]",
+    )
+    parser.add_argument(
+        "-r",
+        "--range",
+        dest="village_range",
+        default=6,
+        type=int,
+        metavar="RANGE",
+        help="Village range, for layouts without a village end marker. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "-p",
+        "--patch",
         default=False,
         action="store_true",
-        help="Some boolean option, False by default, set to True when added.",
+        help="Tuna and Anglerfish symbioses count all resources on neighbouring patches.",
     )
+
     parser.add_argument(
-        "-a",
-        "--argument",
-        default="somearg",
-        metavar="ARG",
-        help="A string argument with a default value. [Default: %(default)s]",
+        "-c",
+        "--cache",
+        dest="cache_size",
+        default=CACHE_SIZE,
+        type=int,
+        metavar="SIZE",
+        help="Number of recent layouts to remember, so repeated and mirrored ones are"
+        " not evaluated again. 0 to disable. [Default: %(default)s]",
     )
 
-    args = parser.parse_args(argv)
+    parser.add_argument(
+        "-s",
+        "--store",
+        metavar="DATABASE",
+        help="SQLite database file to save evaluated layouts, so they are never"
+        " evaluated again.",
+    )
+
+    args = parser.parse_args((sys.argv if argv is None else argv)[1:])
     u.setup_logging(level=args.loglevel, fmt="%(levelname)-8s: %(message)s")
     log.debug(args)
 
-    u.printf("Hello World!")
+    from . import batch
+    from . import store
+
+    with contextlib.ExitStack() as stack:
+        # Close only the files opened here, never stdin or stdout
+        for file in (args.infile, args.outfile):
+            if file not in (sys.stdin, sys.stdout):
+                stack.enter_context(file)
+        database = None if args.store is None else stack.enter_context(store.Store(args.store))
+        count = batch.run(
+            args.infile,
+            args.outfile,
+            args.village_range,
+            patch=args.patch,
+            cache_size=args.cache_size,
+            store=database,
+        )
+    log.debug("Evaluated %s layouts", count)
 
 
 def dispatcher(argv: list[str] | None = None) -> None:
@@ -66,7 +126,18 @@ def dispatcher(argv: list[str] | None = None) -> None:
 
     # Dispatch based on executable name
     name: str = os.path.basename(args[0])
-    ENTRY_POINTS.get(name, cli)(args)
+    entry_point(name)(args)
+
+
+def entry_point(name: str) -> t.Callable[[list[str]], None]:
+    """Command function of an executable name, importing its module. Default is cli()"""
+    if name not in ENTRY_POINTS:
+        return cli
+    module, function = ENTRY_POINTS[name].split(":")
+    command: t.Callable[[list[str]], None] = getattr(
+        importlib.import_module(f".{module}", __package__), function
+    )
+    return command
 
 
 def run(argv: list[str] | None = None) -> None:
@@ -0,0 +1,151 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Memoization of village evaluations by canonical layout, mirrors included
+"""
+from __future__ import annotations
+
+import collections
+import logging
+
+import typing_extensions as t
+
+from . import model as m
+from . import scheduler
+
+if t.TYPE_CHECKING:
+    from . import store as s
+
+__all__ = [
+    "Key",
+    "canonical",
+    "village",
+    "LayoutCache",
+]
+
+log = logging.getLogger(__name__)
+
+MAXSIZE = 2**16
+Key: t.TypeAlias = t.Tuple[t.Tuple[m.TSource, ...], int, int]  # layout, start, until
+
+
+def canonical(layout: t.Sequence[m.TSource], until: int, start: int = 0) -> tuple[Key, bool]:
+    """Canonical key of a village in a layout, and whether it is the mirrored one
+
+    Symbioses do not depend on direction, so reversing both the layout and the village
+    tiles gives the same yields, reversed. When the village is symmetric, such as a
+    whole ocean, this is the same village in the reversed layout.
+    """
+    forward = tuple(layout)
+    backward = forward[::-1]
+    size = len(forward)
+    names = [_.__name__ for _ in forward]
+    if (names[::-1], size - until, size - start) < (names, start, until):
+        return (backward, size - until, size - start), True
+    return (forward, start, until), False
+
+
+def village(
+    layout: t.Sequence[m.TSource], until: int, start: int = 0, patch: bool = False
+) -> list[m.Yields]:
+    """Yields of each village tile, from start to until (exclusive), including empty ones"""
+    world = m.World(layout)
+    if patch:
+        layers = scheduler.Scheduler(world, patch=True)
+        layers.run()
+        tiles = layers.tiles
+    else:
+        tiles = world.tile_yields()
+    return [tiles.get(tile, m.Yields()) for tile in range(start, until)]
+
+
+class LayoutCache:
+    """Village yields and totals, cached by canonical layout with LRU eviction
+
+    Repeated and mirrored layouts cost a dictionary lookup. A maxsize of 0 disables
+    caching. Returned Yields are shared, do not modify them! If a persistent store is
+    set, layouts not in cache are looked up there before evaluating, and saved after.
+    Evaluations can also be made elsewhere, such as in other processes, by get() and add().
+    """
+
+    def __init__(
+        self, maxsize: int = MAXSIZE, patch: bool = False, store: s.Store | None = None
+    ):
+        self.maxsize: int = maxsize
+        self.patch: bool = patch
+        self.store: s.Store | None = store
+        self.hits: int = 0
+        self.loaded: int = 0  # Misses found in store
+        self.misses: int = 0
+        self._cache: collections.OrderedDict[Key, tuple[list[m.Yields], m.Yields]] = (
+            collections.OrderedDict()
+        )
+
+    def village(
+        self, layout: t.Sequence[m.TSource], until: int, start: int = 0
+    ) -> tuple[list[m.Yields], m.Yields]:
+        """Yields of each village tile as in village(), and their total"""
+        cached = self.get(layout, until, start)
+        if cached is not None:
+            return cached
+        tiles = village(layout, until=until, start=start, patch=self.patch)
+        return self.add(layout, until, start, tiles)
+
+    def get(
+        self, layout: t.Sequence[m.TSource], until: int, start: int = 0
+    ) -> tuple[list[m.Yields], m.Yields] | None:
+        """Yields of each village tile and their total, if cached or stored"""
+        key, mirrored = canonical(layout, until, start)
+        try:
+            tiles, total = self._cache[key]
+        except KeyError:
+            clayout, cstart, cuntil = key
+            stored = (
+                None
+                if self.store is None
+                else self.store.village(clayout, cuntil, cstart, patch=self.patch)
+            )
+            if stored is None:
+                self.misses += 1
+                return None
+            self.loaded += 1
+            tiles, total = stored
+            self._remember(key, tiles, total)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        return (tiles[::-1] if mirrored else tiles), total
+
+    def add(
+        self,
+        layout: t.Sequence[m.TSource],
+        until: int,
+        start: int,
+        tiles: t.Sequence[m.Yields],
+    ) -> tuple[list[m.Yields], m.Yields]:
+        """Cache, and store, the yields of each village tile evaluated elsewhere"""
+        key, mirrored = canonical(layout, until, start)
+        items = list(tiles)
+        total = m.Yields.sum(items)
+        if self.store is not None:
+            self.store.add(layout, until, start, items, patch=self.patch)
+        self._remember(key, items[::-1] if mirrored else items, total)
+        return items, total
+
+    def _remember(self, key: Key, tiles: list[m.Yields], total: m.Yields) -> None:
+        if self.maxsize > 0:
+            self._cache[key] = (tiles, total)
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def total(self, layout: t.Sequence[m.TSource], until: int, start: int = 0) -> m.Yields:
+        """Total yields of a village, as World.total()"""
+        return self.village(layout, until, start)[1]
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.hits = self.loaded = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
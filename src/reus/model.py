@@ -6,12 +6,14 @@ Ocean layout helper
 """
 from __future__ import annotations
 
-import dataclasses
+import functools
 import logging
 import operator
+import sys
 
 import typing_extensions as t
 
+from . import engine
 from . import util as u
 
 __all__ = [
@@ -27,45 +29,114 @@ __all__ = [
 
 log = logging.getLogger(__name__)
 
+T = t.TypeVar("T")
 TSource: t.TypeAlias = t.Type["Source"]
+Pool: t.TypeAlias = t.Optional[t.Sequence[TSource]]
+UNLIMITED = sys.maxsize  # Source count in an unrestricted Pool
+# Source evaluations cached by World, and the seed of their circular dependencies, if any
+CACHED: dict[str, t.Callable[[], t.Any] | None] = {
+    "yields": lambda: Yields(),  # Nothing yet
+    "range": None,
+    "all_yields": None,
+}
 SourceMatch: t.TypeAlias = t.Union[TSource, t.Tuple[TSource, ...]]
 Data = u.Data
 
 
-@dataclasses.dataclass
 class Yields:
-    food: int = 0
-    gold: int = 0
-    tech: int = 0
-    awe: int = 0  # Comes before Danger and Natura since it's provided by all kinds of Sources.
-    danger: int = 0  # Only provided by Animals, otherwise follow the same rules.
-    # natura: int = 0  # Only provided by Plants and has unique rule, not a village resource.
+    """Resources on a tile or from a source, truncated to integers as in the game
+
+    Slotted, with hand-written arithmetic, as these are the innermost operations of any
+    evaluation. Otherwise behaves like a (mutable, unhashable) dataclass.
+    """
+
+    # Order matters: positional arguments, iteration and vars()
+    __slots__ = (
+        "food",
+        "gold",
+        "tech",
+        "awe",  # Comes before Danger and Natura since it's provided by all kinds of Sources.
+        "danger",  # Only provided by Animals, otherwise follow the same rules.
+        # "natura",  # Only provided by Plants and has unique rule, not a village resource.
+    )
+    __hash__ = None  # type: ignore  # Mutable
+
+    def __init__(
+        self, food: int = 0, gold: int = 0, tech: int = 0, awe: int = 0, danger: int = 0
+    ):
+        self.food: int = food
+        self.gold: int = gold
+        self.tech: int = tech
+        self.awe: int = awe
+        self.danger: int = danger
 
     @property
     def prosperity(self) -> int:
         return self.food + self.gold + self.tech
 
     @classmethod
-    def sum(cls, iterable: t.Iterable[t.Self]) -> t.Self:
+    def sum(cls, iterable: t.Iterable[Yields]) -> t.Self:
         # Natura works very differently, using max instead of sum
-        return cls(*map(sum, zip(*iterable)))
+        food = gold = tech = awe = danger = 0
+        for item in iterable:
+            food += item.food
+            gold += item.gold
+            tech += item.tech
+            awe += item.awe
+            danger += item.danger
+        return cls(food, gold, tech, awe, danger)
 
     # Intentionally has no __len__, for now. Has no use, and helps spot a misplaced len().
-    # Has no __sub__ or __neg__ simply because they have no use yet.
+    # Has no __neg__ simply because it has no use yet.
 
-    def __iter__(self) -> t.Iterator[t.Any]:
-        return (getattr(self, field.name) for field in dataclasses.fields(self))
+    def __iter__(self) -> t.Iterator[int]:
+        return iter(_values(self))
+
+    @property
+    def __dict__(self) -> dict[str, int]:  # type: ignore  # For vars()
+        return dict(zip(self.__slots__, _values(self)))
+
+    def __reduce__(self) -> tuple[type[t.Self], tuple[int, ...]]:
+        return self.__class__, _values(self)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self.food == other.food
+            and self.gold == other.gold
+            and self.tech == other.tech
+            and self.awe == other.awe
+            and self.danger == other.danger
+        )
 
     def __add__(self, other: object) -> t.Self:
         if not isinstance(other, self.__class__):
             return NotImplemented
-        # Alternatives:
+        # Alternatives, when it was a dataclass:
         # 4.378: self.__class__(*(a + b for a, b in zip(self, other)))
         # 4.349: self.__class__.sum((self, other))
-        # 3.874: current
-        # noinspection PyArgumentList
-        # Pycharm bug: https://youtrack.jetbrains.com/issue/PY-54359
-        return self.__class__(*map(operator.add, self, other))
+        # 3.874: self.__class__(*map(operator.add, self, other))
+        # Current, slotted, is about 10 times faster than the last one.
+        # Measure with: reus-bench --benchmark yields_add
+        return self.__class__(
+            self.food + other.food,
+            self.gold + other.gold,
+            self.tech + other.tech,
+            self.awe + other.awe,
+            self.danger + other.danger,
+        )
+
+    def __sub__(self, other: object) -> t.Self:
+        if not isinstance(other, self.__class__):
+            return NotImplemented
+        return self.__class__(
+            self.food - other.food,
+            self.gold - other.gold,
+            self.tech - other.tech,
+            self.awe - other.awe,
+            self.danger - other.danger,
+        )
 
     def __radd__(self, other: object) -> t.Self:
         # Special-case zero so regular sum() works, as it will start with 0 + self.
@@ -78,8 +149,13 @@ class Yields:
     def __mul__(self, other: object) -> t.Self:
         if not isinstance(other, (int, float)):
             return NotImplemented
-        # noinspection PyArgumentList
-        return self.__class__(*map(int, map(other.__mul__, self)))
+        return self.__class__(
+            int(self.food * other),
+            int(self.gold * other),
+            int(self.tech * other),
+            int(self.awe * other),
+            int(self.danger * other),
+        )
 
     def __rmul__(self, other: object) -> t.Self:
         # For num * Yields
@@ -91,41 +167,237 @@ class Yields:
     def __floordiv__(self, other: object) -> t.Self:
         if not isinstance(other, (int, float)):
             return NotImplemented
-        # noinspection PyArgumentList
-        return self.__class__(*map(int, map(other.__rfloordiv__, self)))
+        return self.__class__(
+            int(self.food // other),
+            int(self.gold // other),
+            int(self.tech // other),
+            int(self.awe // other),
+            int(self.danger // other),
+        )
 
     def __str__(self) -> str:
-        # NamedTuple version: vars(self), defaults = self._asdict(), self._field_defaults
-        defaults = {f.name: f.default for f in dataclasses.fields(self)}  # or assume all 0s
-        diff = {k: v for k, v in vars(self).items() if not v == defaults[k]}  # if v
+        diff = {k: v for k, v in zip(self.__slots__, _values(self)) if v}  # Defaults are 0
         return ", ".join("=".join(map("{:2}".format, _)) for _ in diff.items()) or "-"
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}({self})>"
 
 
+_values: t.Callable[[Yields], tuple[int, ...]] = operator.attrgetter(*Yields.__slots__)
+
+
 class World:
+    """Linear layout of Sources, one per tile
+
+    Yields, range and all_yields of each source are evaluated by an engine.Evaluator, which
+    resolves circular dependencies between them and caches them per layout. All methods
+    that change the layout invalidate the cache. Changing .sources directly requires
+    invalidate().
+    Tiles of sources are indexed, so finding them does not depend on the world size.
+    Replacing and swapping sources re-evaluate only the tiles they might affect.
+    """
+
     def __init__(self, layout: t.Iterable[Source | TSource] = ()):
-        self.sources: list[Source] = []
-        for item in layout:
-            source: Source = item if isinstance(item, Source) else item()
-            source.world = self
-            self.sources.append(source)
+        self.species: dict[TSource, int] = {}  # Number of sources of each class
+        self.sources: list[Source] = [self._adopt(item) for item in layout]
+        self.version: int = 0  # Increased on every layout change
+        self.engine: engine.Evaluator = engine.Evaluator()
+        self._tiles: dict[int, Yields] | None = None
+        self._cover: dict[int, int] = {}  # Number of sources yielding on each tile
+        self._totals: dict[tuple[int | None, int | None], Yields] = {}
+        self._index: dict[Source, int] = {}  # Sources hash by identity
+        self._reindex()
+
+    def _adopt(self, item: Source | TSource) -> Source:
+        source: Source = item if isinstance(item, Source) else item()
+        source.world = self
+        cls = type(source)
+        self.species[cls] = self.species.get(cls, 0) + 1
+        return source
+
+    def _release(self, source: Source) -> None:
+        source.world = None
+        cls = type(source)
+        self.species[cls] -= 1
+        if not self.species[cls]:
+            del self.species[cls]
+
+    def _reindex(self, start: int = 0) -> None:
+        for tile, source in enumerate(self.sources[start:], start):
+            self._index[source] = tile
+
+    def _reset(self) -> None:
+        self.version += 1
+        self.engine.clear()
+        self._tiles = None
+        self._cover.clear()
+        self._totals.clear()
+
+    def invalidate(self) -> None:
+        """Discard all cached evaluations, must be called after any layout change"""
+        self.species.clear()
+        for source in self.sources:
+            self._adopt(source)
+        self._index.clear()
+        self._reindex()
+        self._reset()
+
+    @property
+    def reach(self) -> int:
+        """Distance from a tile up to which sources might be affected by its source"""
+        return self._reach(self.species)
+
+    @staticmethod
+    def _reach(species: t.Iterable[TSource]) -> int:
+        # Yields and range of a source only depend on sources within a neighbour's range
+        return 1 + max((cls.max_range() for cls in species), default=0)
+
+    def update(
+        self,
+        changes: t.Mapping[int, Source | TSource],
+        until: int | None = None,
+        start: int | None = 0,
+    ) -> tuple[dict[int, Yields], Yields]:
+        """Replace the sources of some tiles, re-evaluating only the affected ones
+
+        Return the new yields of all changed tiles and the new total, from start to until
+        (exclusive) tiles as in all_yields(). Cost depends on the number of changes and on
+        the reach of the sources, not on the world size.
+        """
+        tiles = self._update(changes)[1]
+        return (
+            {
+                k: self.tile_yields().get(k, Yields())
+                for k in sorted(tiles)
+                if self._within(k, start, until)
+            },
+            self.total(until=until, start=start),
+        )
+
+    def _update(
+        self, changes: t.Mapping[int, Source | TSource]
+    ) -> tuple[list[Source], set[int]]:
+        """Replace sources, returning the old ones and the tiles whose yields changed"""
+        positions = {self.tile(self.source(tile)): item for tile, item in changes.items()}
+        if self._tiles is None:
+            # Nothing evaluated yet, so nothing to update
+            old = self._place(positions)
+            self._reset()
+            return old, set()
+
+        # Sources that might change, before or after
+        reach = self._reach(
+            list(self.species)
+            + [_ if isinstance(_, type) else type(_) for _ in changes.values()]
+        )
+        tiles = {tile for position in positions for tile in self._nearby_tiles(position, reach)}
+        if any(cls.PLANETARY for cls in self.species):
+            tiles.update(tile for tile, _ in enumerate(self.sources) if _.PLANETARY)
+        window = sorted(tiles)
+
+        before = [self._fold(self.sources[tile].all_yields(relative=False)) for tile in window]
+        old = self._place(positions)
+        for source in old:
+            self.engine.forget(source)
+        for tile in window:
+            self.engine.forget(self.sources[tile])
+        after = [self._fold(self.sources[tile].all_yields(relative=False)) for tile in window]
+
+        changed: dict[int, Yields] = {}
+        for contributions, sign in ((before, -1), (after, 1)):
+            for contribution in contributions:
+                for tile, yields in contribution.items():
+                    changed.setdefault(tile, self._tiles.get(tile, Yields()))
+                    self._cover[tile] = self._cover.get(tile, 0) + sign
+                    tile_yields = self._tiles.get(tile, Yields())
+                    self._tiles[tile] = (
+                        tile_yields + yields if sign > 0 else tile_yields - yields
+                    )
+        for tile in changed:
+            if not self._cover[tile]:
+                del self._cover[tile]
+                del self._tiles[tile]
+
+        for (start, until), total in self._totals.items():
+            self._totals[start, until] = Yields.sum(
+                [total]
+                + [
+                    self._tiles.get(tile, Yields()) - yields
+                    for tile, yields in changed.items()
+                    if self._within(tile, start, until)
+                ]
+            )
+        self.version += 1
+        return old, set(changed)
+
+    def _place(self, positions: dict[int, Source | TSource]) -> list[Source]:
+        old = [self.sources[tile] for tile in positions]
+        for source in old:
+            self._release(source)
+            del self._index[source]
+        for tile, item in positions.items():
+            self.sources[tile] = source = self._adopt(item)
+            self._index[source] = tile
+        return old
+
+    def replace(self, tile: int, item: Source | TSource) -> Source:
+        """Put a new source in a tile, returning the old one"""
+        return self._update({tile: item})[0][0]
+
+    def swap(self, tile1: int, tile2: int) -> None:
+        """Exchange the sources of 2 tiles"""
+        self._update({tile1: self.source(tile2), tile2: self.source(tile1)})
+
+    def insert(self, tile: int, item: Source | TSource) -> Source:
+        """Insert a new source before a tile, shifting all the next ones"""
+        source = self._adopt(item)
+        self.sources.insert(tile, source)
+        self._reindex(min(max(tile, 0), len(self.sources) - 1))
+        self._reset()
+        return source
+
+    def remove(self, tile: int) -> Source:
+        """Remove and return the source in a tile, shifting all the next ones"""
+        source = self.source(tile)
+        tile = self._index.pop(source)
+        del self.sources[tile]
+        self._reindex(tile)
+        self._release(source)
+        self._reset()
+        return source
 
     def source(self, tile: int) -> Source:
         """The source in a tile (index)"""
         try:
             return self.sources[tile]
-        except ValueError as e:
+        except IndexError as e:
             raise u.ReusError("Tile not found: %s", tile) from e
 
     def tile(self, source: Source) -> int:
         """The tile (index) of a source"""
         try:
-            return self.sources.index(source)
-        except ValueError as e:
+            return self._index[source]
+        except KeyError as e:
             raise u.ReusError("Natural Source not found: %s", source) from e
 
+    def count(self, matching: SourceMatch) -> int:
+        """Number of sources of a type in the whole World, regardless of size"""
+        return sum(n for cls, n in self.species.items() if issubclass(cls, matching))
+
+    # Geometry of tiles, overridden by worlds that are not a line, such as a Planet
+
+    def _nearby_tiles(self, tile: int, distance: int) -> t.Iterable[int]:
+        """Tiles of sources within a distance from a tile, itself included"""
+        return range(max(tile - distance, 0), min(tile + distance + 1, len(self.sources)))
+
+    def _fold(self, yields: dict[int, Yields]) -> dict[int, Yields]:
+        """Yields per tile, moved to the actual tiles of the World"""
+        return yields
+
+    def _within(self, tile: int, start: int | None, until: int | None) -> bool:
+        """If a tile is in the range from start to until (exclusive), None for no limit"""
+        return (start is None or tile >= start) and (until is None or tile < until)
+
     def nearby_sources(
         self, source: Source, matching: SourceMatch | None = None, distance: int = 1
     ) -> list[Source]:
@@ -144,36 +416,86 @@ class World:
         self, source: Source, matching: SourceMatch | None = None, distance: int = 1
     ) -> Yields:
         """Total Yields nearby a given source, regardless of provider"""
-        all_yields = self.all_yields()
+        all_yields = self.tile_yields()
         return Yields.sum(
             all_yields[self.tile(src)]
             for src in self.nearby_sources(source, matching, distance)
         )
 
+    def tile_yields(self) -> dict[int, Yields]:
+        """Dictionary of tiles->yields on all affected tiles. Cached, do not modify it!"""
+        if self._tiles is None:
+            tiles: dict[int, list[Yields]] = {}
+            for source in self.sources:
+                for tile, yields in self._fold(source.all_yields(relative=False)).items():
+                    tiles.setdefault(tile, [])
+                    tiles[tile].append(yields)
+            self._tiles = {k: Yields.sum(v) for k, v in tiles.items()}
+            self._cover = {k: len(v) for k, v in tiles.items()}
+        return self._tiles
+
     def all_yields(self, until: int | None = None, start: int | None = 0) -> dict[int, Yields]:
         """Dictionary of tiles->yields, with optional start and stop (exclusive) tiles"""
-        tiles: dict[int, list[Yields]] = {}
-        for source in self.sources:
-            for tile, yields in source.all_yields(relative=False).items():
-                tiles.setdefault(tile, [])
-                tiles[tile].append(yields)
-        return {
-            k: Yields.sum(v)
-            for k, v in tiles.items()
-            if (start is None or k >= start) and (until is None or k < until)
-        }
+        return {k: v for k, v in self.tile_yields().items() if self._within(k, start, until)}
+
+    def total(self, until: int | None = None, start: int | None = 0) -> Yields:
+        """Total yields of all_yields(). Cached, and kept updated by replace() and swap()"""
+        key = (start, until)
+        if key not in self._totals:
+            self._totals[key] = Yields.sum(self.all_yields(until=until, start=start).values())
+        return self._totals[key]
+
+
+def subclasses(cls: TSource) -> list[TSource]:
+    """All subclasses of a Source class, recursively"""
+    return [_ for sub in cls.__subclasses__() for _ in (sub, *subclasses(sub))]
+
+
+def cached(
+    func: t.Callable[..., T], seed: t.Callable[[], t.Any] | None = None
+) -> t.Callable[..., T]:
+    """Decorator to evaluate a Source method by its World engine, cached until layout changes
+
+    Results are keyed by the decorated function, so each class in the MRO has its own.
+    Seed is the starting value when evaluation depends on itself, if None that is an error.
+    Sources without a World are not cached.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self: Source, *args: t.Any, **kwargs: t.Any) -> T:
+        if self.world is None:
+            return func(self, *args, **kwargs)
+        key = (wrapper, args, tuple(kwargs.items())) if args or kwargs else wrapper
+        value: T = self.world.engine.evaluate(self, key, seed, func, self, *args, **kwargs)
+        return value
+
+    setattr(wrapper, "__cached__", True)
+    return wrapper
 
 
 class Source:
     """Base class for all Natural Sources"""
 
     BASE: t.ClassVar[Yields] = Yields()
+    PLANETARY: t.ClassVar[bool] = False  # Depends on sources anywhere, see World.count()
     #    LEVEL: t.ClassVar[int] = 1
     SLOTS: t.ClassVar[int] = 1  # Default for Level 1, Tier 1 sources
 
     def __init__(self) -> None:
         self.world: World | None = None
 
+    def __init_subclass__(cls, **kwargs: t.Any) -> None:
+        # Cache overridden evaluations, so subclasses can declare them as usual
+        super().__init_subclass__(**kwargs)
+        for name, seed in CACHED.items():
+            attr = cls.__dict__.get(name)
+            if isinstance(attr, property) and attr.fget is not None:
+                if not hasattr(attr.fget, "__cached__"):
+                    func = cached(attr.fget, seed=seed)
+                    setattr(cls, name, property(func, doc=attr.__doc__))
+            elif callable(attr) and not hasattr(attr, "__cached__"):
+                setattr(cls, name, cached(attr, seed=seed))
+
     @property
     def name(self) -> str:
         # Too bad classmethod properties were deprecated in 3.11...
@@ -181,10 +503,15 @@ class Source:
 
     @property
     def kind(self) -> str:
+        return self.species()
+
+    @classmethod
+    def species(cls) -> str:
+        """Source kind, regardless of tier. Same as .kind, but for classes"""
         # 2 options here: via string manipulation on name (easy but lame),
         # or diving into __mro__ for proper OOP, but good luck with that!
         # Guess the chosen approach?
-        return self.name.lstrip("Great").lstrip("Superior")
+        return cls.__name__.lstrip("Great").lstrip("Superior")
 
     @property
     def tile(self) -> int:
@@ -199,6 +526,7 @@ class Source:
         return 0
 
     @property
+    @cached
     def yields(self) -> Yields:
         """Yields by itself on its own tile, usually just Base + Symbioses"""
         return self.BASE
@@ -208,6 +536,7 @@ class Source:
         """Sum of yields on all affected titles"""
         return Yields.sum(self.all_yields().values())
 
+    @cached
     def all_yields(self, relative: bool = True) -> dict[int, Yields]:
         """Yields by itself per tile on all affected tiles"""
         return {0 if relative else self.tile: self.yields}
@@ -217,6 +546,38 @@ class Source:
             return []
         return self.world.nearby_sources(self, matching=matching, distance=distance)
 
+    # Upper bounds, used by searches to discard layouts without evaluating them.
+    # The pool is the multiset of all Source classes in a layout, including this one.
+    # No pool means any layout. Subclasses with symbioses must override them, and
+    # bounds must never underestimate.
+
+    @classmethod
+    def max_yields(cls, pool: Pool = None) -> Yields:
+        """Upper bound of yields by itself on its own tile, if placed among pool"""
+        return cls.BASE
+
+    @classmethod
+    def max_range(cls, pool: Pool = None) -> int:
+        """Upper bound of range, always 0 for non-Animals as they yield on their own tile"""
+        return 0
+
+    @classmethod
+    def others(cls, pool: Pool, matching: SourceMatch) -> int:
+        """Number of sources in pool matching a type, not counting itself"""
+        if pool is None:
+            return UNLIMITED
+        return sum(issubclass(_, matching) for _ in pool) - issubclass(cls, matching)
+
+    @classmethod
+    def other_kinds(cls, pool: Pool, matching: SourceMatch) -> int:
+        """Number of different kinds of sources in pool matching a type, excluding itself"""
+        if pool is None:
+            return UNLIMITED
+        others = list(pool)
+        if cls in others:
+            others.remove(cls)
+        return len(set(_.species() for _ in others if issubclass(_, matching)))
+
     def __repr__(self) -> str:
         return f"<{self.name}({self.yields})>"
 
@@ -227,6 +588,7 @@ class Animal(Source):
     RANGE: t.ClassVar[int] = 2
     ASPECTS: list[Aspect]  # Mandatory aspects
 
+    @cached
     def all_yields(self, relative: bool = True) -> dict[int, Yields]:
         return {
             idx + (0 if relative else self.tile): self.yields
@@ -234,9 +596,14 @@ class Animal(Source):
         }
 
     @property
+    @cached
     def range(self) -> int:
         return self.RANGE
 
+    @classmethod
+    def max_range(cls, pool: Pool = None) -> int:
+        return cls.RANGE
+
     def within_range(self, matching: SourceMatch) -> list[Source]:
         return super().nearby(matching=matching, distance=self.range)
 
@@ -255,12 +622,17 @@ class Plant(Source):
     """Base class for Plant"""
 
 
-# Unused, for now just a way to dump game data values
 class Aspect:
-    BONUS: Yields | tuple[Yields, int] | tuple[Yields, Yields, int] = Yields()
+    """Base class for Aspects, added to the slots of a source to increase its yields
 
-    def __init__(self) -> None:
-        self.source: Source | None = None
+    Bonus is either always granted, granted only with at least some Natura on the
+    source, or a base bonus upgraded to another one with at least that Natura.
+    """
+
+    BONUS: t.ClassVar[Yields | tuple[Yields, int] | tuple[Yields, Yields, int]] = Yields()
+
+    def __init__(self, source: Source | None = None) -> None:
+        self.source: Source | None = source
 
     @property
     def natura(self) -> int:
@@ -268,5 +640,15 @@ class Aspect:
             return 0
         return self.source.natura
 
+    @classmethod
+    def bonus(cls, natura: int = 0) -> Yields:
+        """Yields added to a source with a given Natura"""
+        if isinstance(cls.BONUS, Yields):
+            return cls.BONUS
+        *bonuses, threshold = cls.BONUS
+        if natura >= threshold:
+            return bonuses[-1]
+        return bonuses[0] if len(bonuses) > 1 else Yields()
+
     def yields(self) -> Yields:
-        return Yields() if self.natura else Yields()
+        return self.bonus(self.natura)
@@ -0,0 +1,82 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Layout notation: fish names, possibly abbreviated, and village markers
+
+Shared by reus-fish-calculator, batch and serve, so the latter ones don't import the
+calculator and all its searches.
+"""
+from __future__ import annotations
+
+import logging
+
+import typing_extensions as t
+
+from . import gamedata as g
+from . import model as m
+from . import util as u
+
+__all__ = [
+    "VILLAGE_START",
+    "VILLAGE_END",
+    "FISH",
+    "lookup",
+    "fish",
+    "parse",
+]
+
+log = logging.getLogger(__name__)
+
+VILLAGE_START = "@"  # Marks the first village tile in a layout
+VILLAGE_END = "]"  # Marks the tile after the last one
+
+FISH: dict[str, m.TSource] = {cls.__name__.lower(): cls for cls in m.subclasses(g.Fish)}
+
+T = t.TypeVar("T", bound=type)
+
+
+def lookup(name: str, table: dict[str, T], kind: str) -> T:
+    """Class by its name or an unambiguous prefix of it, case-insensitive"""
+    key = name.lower()
+    if key in table:
+        return table[key]
+    matches = [cls for k, cls in table.items() if k.startswith(key)]
+    if len(matches) == 1:
+        return matches[0]
+    if not matches:
+        raise u.ReusError("%s not found: %s", kind.capitalize(), name)
+    raise u.ReusError(
+        "Ambiguous %s %r, could be: %s", kind, name, ", ".join(_.__name__ for _ in matches)
+    )
+
+
+def fish(name: str) -> m.TSource:
+    """Fish class by its name or an unambiguous prefix of it, case-insensitive"""
+    return lookup(name, FISH, "fish")
+
+
+def parse(tokens: t.Iterable[str]) -> tuple[list[m.TSource], int | None, int | None]:
+    """Layout from fish names, and village start and end tiles, if marked
+
+    Village tiles are the ones between @ and ], such as: @ Seabass Clown Parrot ] Mack
+    """
+    layout: list[m.TSource] = []
+    start: int | None = None
+    until: int | None = None
+    for token in tokens:
+        if token == VILLAGE_START:
+            if start is not None:
+                raise u.ReusError("Village start %r found twice", token)
+            start = len(layout)
+        elif token == VILLAGE_END:
+            if until is not None:
+                raise u.ReusError("Village end %r found twice", token)
+            until = len(layout)
+        else:
+            layout.append(fish(token))
+    if start is not None and until is not None and until < start:
+        raise u.ReusError(
+            "Village end %r comes before its start %r", VILLAGE_END, VILLAGE_START
+        )
+    return layout, start, until
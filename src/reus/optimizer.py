@@ -0,0 +1,365 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Layout optimizer: best arrangement of a multiset of sources
+"""
+from __future__ import annotations
+
+import dataclasses
+import logging
+import multiprocessing
+import os
+
+import typing_extensions as t
+
+from . import bounds
+from . import constraints as c
+from . import model as m
+from . import util as u
+
+if t.TYPE_CHECKING:
+    from . import store as s
+
+__all__ = [
+    "Solution",
+    "Search",
+    "parallel_search",
+    "optimize",
+]
+
+log = logging.getLogger(__name__)
+
+SHARDS_PER_JOB = 8
+
+
+@dataclasses.dataclass
+class Solution:
+    layout: tuple[m.TSource, ...] = ()
+    total: m.Yields = dataclasses.field(default_factory=m.Yields)
+    evaluated: int = 0  # Complete layouts scored by World
+    pruned: int = 0  # Partial layouts discarded by their upper bound or constraints
+
+    @property
+    def prosperity(self) -> int:
+        return self.total.prosperity
+
+    def world(self) -> m.World:
+        return m.World(self.layout)
+
+
+class Search:
+    """Depth-first Branch and Bound search for the layout with the highest Prosperity
+
+    Layouts are built from the first tile onwards. Sources far enough from the last placed
+    tile can no longer change, so their contribution to the village is exact. All others,
+    placed or not, are estimated by their class upper bounds.
+
+    Constraints, if any, are checked on each partial layout, so the ones that can't
+    meet them are never searched further, and only complete ones meeting them are scored.
+    """
+
+    def __init__(
+        self,
+        pool: t.Iterable[m.TSource],
+        size: int | None = None,
+        village: int = 6,
+        constraints: c.Constraints | None = None,
+    ):
+        self.pool: list[m.TSource] = list(pool)
+        self.size: int = len(self.pool) if size is None else size
+        self.village: int = village
+        if not 0 < self.size <= len(self.pool):
+            raise u.ReusError(
+                "Ocean size must be between 1 and the number of sources (%s): %s",
+                len(self.pool),
+                self.size,
+            )
+        self.constraints: c.Constraints = constraints or c.Constraints()
+        self.constraints.validate(self.pool, self.size)
+
+        # Species and their counts, best ones first so good layouts are found early
+        self.bounds: bounds.Bounds = bounds.Bounds(self.pool, self.village, self.size)
+        score = self.bounds.score
+        self.species: list[m.TSource] = sorted(score, key=score.__getitem__, reverse=True)
+        self.counts: dict[m.TSource, int] = {cls: self.pool.count(cls) for cls in self.species}
+
+        self.reach: int = self.bounds.reach
+        # Sources past this tile can't affect the village, so their order is irrelevant
+        self.horizon: int = self.village + max(self.bounds.range.values()) + self.reach
+
+        self.best: Solution = Solution()
+        self._found: bool = False
+
+    def contribution(self, source: m.Source) -> m.Yields:
+        """Yields of a source on all village tiles"""
+        return m.Yields.sum(
+            yields
+            for tile, yields in source.all_yields(relative=False).items()
+            if 0 <= tile < self.village
+        )
+
+    def remaining(self) -> list[m.TSource]:
+        """Sources not yet placed in the current partial layout"""
+        return [cls for cls, count in self.counts.items() for _ in range(count)]
+
+    def upper_bound(self, layout: list[m.TSource], settled: m.Yields) -> int:
+        """Best possible prosperity of any layout starting with a partial one"""
+        return self.bounds.partial(
+            layout,
+            self.remaining(),
+            settled.prosperity,
+            start=max(len(layout) - self.reach, 0),
+        )
+
+    def prefixes(self, depth: int) -> t.Iterator[tuple[m.TSource, ...]]:
+        """All distinct partial layouts of a given length, in search order"""
+
+        def walk(layout: list[m.TSource]) -> t.Iterator[tuple[m.TSource, ...]]:
+            if len(layout) == depth:
+                yield tuple(layout)
+                return
+            for cls in self.species:
+                if not self.counts[cls] or not self.constraints.allows(layout, cls):
+                    continue
+                self.counts[cls] -= 1
+                layout.append(cls)
+                yield from walk(layout)
+                layout.pop()
+                self.counts[cls] += 1
+
+        yield from walk([])
+
+    def run(self, prefix: t.Sequence[m.TSource] = ()) -> Solution:
+        """Search all layouts, or only the ones starting with a given partial layout"""
+        self._found = False
+        self.best = Solution()
+        self._walk(prefix)
+        log.debug(
+            "Evaluated %s layouts, pruned %s partial ones",
+            self.best.evaluated,
+            self.best.pruned,
+        )
+        return self.best
+
+    def _walk(self, prefix: t.Sequence[m.TSource] = ()) -> None:
+        """Search layouts starting with a partial one, restoring counts afterwards"""
+        layout: list[m.TSource] = []
+        settled = m.Yields()
+        try:
+            for cls in prefix:
+                if not self.counts.get(cls):
+                    raise u.ReusError("Partial layout does not match sources: %s", prefix)
+                if not self.constraints.allows(layout, cls):
+                    raise u.ReusError("Partial layout does not meet constraints: %s", prefix)
+                settled = self._place(layout, cls, settled)
+            self._search(layout, settled)
+        finally:
+            while layout:
+                self._remove(layout)
+
+    def _place(self, layout: list[m.TSource], cls: m.TSource, settled: m.Yields) -> m.Yields:
+        """Append a source to a layout, returning the updated exact contributions"""
+        self.counts[cls] -= 1
+        layout.append(cls)
+        tile = len(layout) - self.reach - 1
+        if tile >= 0:
+            # Everything that might change its yields is already placed
+            settled = settled + self.contribution(m.World(layout).source(tile))
+        return settled
+
+    def _remove(self, layout: list[m.TSource]) -> None:
+        self.counts[layout.pop()] += 1
+
+    def _feasible(self, layout: list[m.TSource]) -> bool:
+        """If a partial layout, just placed, can still meet the constraints"""
+        if not self.constraints:
+            return True
+        if not self.constraints.feasible(layout, self.counts, self.size):
+            return False
+        tile = len(layout) - self.reach - 1
+        if tile >= 0 and layout[tile] in self.constraints.required:
+            return self.constraints.satisfied(m.World(layout).source(tile))
+        return True
+
+    def _complete(self, layout: list[m.TSource]) -> list[m.TSource] | None:
+        """First layout in search order completing a partial one and meeting constraints"""
+        remaining = [cls for cls in self.species for _ in range(self.counts[cls])]
+        complete = layout + remaining[: self.size - len(layout)]
+        if not self.constraints or self.constraints.met(m.World(complete)):
+            return complete
+        if len(layout) == self.size:
+            return None
+        for cls in self.species:
+            if not self.counts[cls] or not self.constraints.allows(layout, cls):
+                continue
+            self.counts[cls] -= 1
+            layout.append(cls)
+            found = self._complete(layout) if self._feasible(layout) else None
+            self._remove(layout)
+            if found is not None:
+                return found
+        return None
+
+    def _prune(self, bound: int) -> bool:
+        return self._found and bound <= self.best.prosperity
+
+    def _discard(self, layout: list[m.TSource], settled: m.Yields) -> bool:
+        """If a partial layout, just placed, can't beat the layouts found so far"""
+        return self._prune(self.upper_bound(layout, settled))
+
+    def _search(self, layout: list[m.TSource], settled: m.Yields) -> None:
+        if len(layout) >= self.horizon or len(layout) == self.size:
+            # Village yields no longer depend on the order of the remaining sources
+            complete = self._complete(layout)
+            if complete is not None:
+                self._evaluate(complete)
+            return
+
+        for cls in self.species:
+            if not self.counts[cls] or not self.constraints.allows(layout, cls):
+                continue
+            score = self._place(layout, cls, settled)
+            if not self._feasible(layout) or self._discard(layout, score):
+                self.best.pruned += 1
+            else:
+                self._search(layout, score)
+            self._remove(layout)
+
+    def _evaluate(self, layout: list[m.TSource]) -> None:
+        total = m.Yields.sum(m.World(layout).all_yields(until=self.village).values())
+        self.best.evaluated += 1
+        if not self._found or total.prosperity > self.best.prosperity:
+            self._found = True
+            self.best.layout = tuple(layout)
+            self.best.total = total
+
+
+class _ShardSearch(Search):
+    """Search running in a worker process, sharing the best Prosperity with its siblings
+
+    Pruning by others' best must be strict, so layouts tied with it are still found and
+    merging shards in search order gives the same result as a single sequential search.
+    """
+
+    def __init__(self, *args: t.Any, shared: t.Any, lock: t.Any, **kwargs: t.Any):
+        super().__init__(*args, **kwargs)
+        self.shared = shared
+        self.lock = lock
+
+    def _prune(self, bound: int) -> bool:
+        return super()._prune(bound) or bound < self.shared.value
+
+    def _evaluate(self, layout: list[m.TSource]) -> None:
+        best = self.best.prosperity if self._found else -1
+        super()._evaluate(layout)
+        if self.best.prosperity > best and self.best.prosperity > self.shared.value:
+            with self.lock:
+                self.shared.value = max(self.shared.value, self.best.prosperity)
+
+
+# Worker process state, set by the pool initializer
+_worker: _ShardSearch
+
+
+def _init_worker(
+    pool: tuple[m.TSource, ...],
+    size: int,
+    village: int,
+    constraints: c.Constraints,
+    shared: t.Any,
+    lock: t.Any,
+) -> None:
+    global _worker
+    _worker = _ShardSearch(
+        pool, size=size, village=village, constraints=constraints, shared=shared, lock=lock
+    )
+
+
+def _run_shard(shard: tuple[int, ...]) -> tuple[tuple[int, ...], tuple[int, ...], int, int]:
+    """Search a shard, described by species indexes. Returns the same for its solution"""
+    species = _worker.species
+    solution = _worker.run(tuple(species[_] for _ in shard))
+    return (
+        tuple(map(species.index, solution.layout)),
+        tuple(solution.total),
+        solution.evaluated,
+        solution.pruned,
+    )
+
+
+def parallel_search(search: Search, jobs: int | None = None) -> Solution:
+    """Run a search in a pool of worker processes, one partial layout at a time
+
+    Shards are sent as tuples of species indexes and merged in search order,
+    so the result is the same regardless of the number of workers.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    # Enough shards to keep all workers busy even when some are pruned early
+    depth = 0
+    shards: list[tuple[m.TSource, ...]] = [()]
+    while len(shards) < SHARDS_PER_JOB * jobs and depth < min(search.size, search.horizon):
+        depth += 1
+        shards = list(search.prefixes(depth))
+    indexes = [tuple(map(search.species.index, shard)) for shard in shards]
+    log.debug("Searching %s shards of depth %s in %s processes", len(shards), depth, jobs)
+
+    ctx = multiprocessing.get_context()
+    shared = ctx.RawValue("q", -1)
+    lock = ctx.Lock()
+    best = Solution()
+    found = False
+    with ctx.Pool(
+        processes=jobs,
+        initializer=_init_worker,
+        initargs=(
+            tuple(search.pool),
+            search.size,
+            search.village,
+            search.constraints,
+            shared,
+            lock,
+        ),
+    ) as pool:
+        for layout, total, evaluated, pruned in pool.imap(_run_shard, indexes):
+            best.evaluated += evaluated
+            best.pruned += pruned
+            if layout and (not found or m.Yields(*total).prosperity > best.prosperity):
+                found = True
+                best.layout = tuple(search.species[_] for _ in layout)
+                best.total = m.Yields(*total)
+    return best
+
+
+def optimize(
+    pool: t.Iterable[m.TSource],
+    size: int | None = None,
+    village: int = 6,
+    jobs: int | None = 1,
+    store: s.Store | None = None,
+    constraints: c.Constraints | None = None,
+) -> Solution:
+    """Best layout of a given size for a multiset of sources, by village Prosperity
+
+    Search runs in multiple processes if jobs is not 1, and all CPUs if jobs is 0 or None.
+    With a persistent store, searches already made are not made again, and new ones are
+    saved, along with their best layout. Searches with constraints are not saved.
+    """
+    search = Search(pool=pool, size=size, village=village, constraints=constraints)
+    if search.constraints:
+        store = None
+    if store is not None:
+        layout = store.search(search.pool, search.size, village)
+        if layout is not None:
+            log.debug("Found in store: %s", layout)
+            return Solution(tuple(layout), m.World(layout).total(until=village))
+
+    solution = search.run() if jobs == 1 else parallel_search(search, jobs)
+    if not solution.layout:
+        raise u.ReusError("No layout meets the constraints")
+    if store is not None:
+        world = solution.world()
+        tiles = [world.tile_yields().get(_, m.Yields()) for _ in range(village)]
+        store.add(solution.layout, village, 0, tiles)
+        store.add_search(search.pool, search.size, village, solution.layout)
+    return solution
@@ -0,0 +1,130 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Multi-objective layout search: all layouts not dominated by another one in any resource
+"""
+from __future__ import annotations
+
+import logging
+import operator
+
+import typing_extensions as t
+
+from . import bounds
+from . import constraints as c
+from . import model as m
+from . import optimizer
+from . import util as u
+
+__all__ = [
+    "FIELDS",
+    "MINIMIZED",
+    "dominates",
+    "Pareto",
+]
+
+log = logging.getLogger(__name__)
+
+FIELDS: tuple[str, ...] = tuple(vars(m.Yields()))  # Resources, in Yields order
+MINIMIZED: tuple[str, ...] = ("danger",)  # Less is better, all others more is better
+Vector: t.TypeAlias = t.Tuple[int, ...]  # Objectives, negated when minimized
+
+
+def dominates(a: Vector, b: Vector) -> bool:
+    """If a is at least as good as b in all objectives, and better in at least one"""
+    return a != b and all(map(operator.ge, a, b))
+
+
+class Pareto(optimizer.Search):
+    """Depth-first search for the Pareto frontier of layouts, by village yields
+
+    Layouts are built, and constraints checked, as in optimizer.Search. Each partial layout
+    has an optimistic vector: for each objective, the upper bound of any layout starting
+    with it, or the exact contribution of settled sources for minimized ones. Partial
+    layouts whose optimistic vector is not better than a frontier layout in some objective
+    are pruned. Caps, by resource name, discard layouts with more than that of any resource.
+    Only one layout is kept for each vector of objectives.
+    """
+
+    def __init__(
+        self,
+        pool: t.Iterable[m.TSource],
+        size: int | None = None,
+        village: int = 6,
+        objectives: t.Sequence[str] = FIELDS,
+        caps: t.Mapping[str, int] | None = None,
+        constraints: c.Constraints | None = None,
+    ):
+        super().__init__(pool, size=size, village=village, constraints=constraints)
+        unknown = [_ for _ in (*objectives, *(caps or {})) if _ not in FIELDS]
+        if unknown or not objectives:
+            raise u.ReusError("Objectives must be resources in %s: %s", FIELDS, unknown)
+        self.objectives: tuple[str, ...] = tuple(objectives)
+        self.caps: dict[str, int] = dict(caps or {})
+        self.limits: dict[str, bounds.Bounds] = {
+            field: bounds.Bounds(
+                self.pool, village, self.size, score=operator.attrgetter(field)
+            )
+            for field in self.objectives
+            if field not in MINIMIZED
+        }
+        self.layouts: dict[Vector, tuple[m.TSource, ...]] = {}
+        self.totals: dict[Vector, m.Yields] = {}
+
+    def vector(self, total: m.Yields) -> Vector:
+        return tuple(
+            -getattr(total, _) if _ in MINIMIZED else getattr(total, _) for _ in self.objectives
+        )
+
+    def frontier(self) -> list[optimizer.Solution]:
+        """Search all layouts, returning the frontier ones, best Prosperity first"""
+        self.best = optimizer.Solution()
+        self.layouts.clear()
+        self.totals.clear()
+        self._walk()
+        solutions = [
+            optimizer.Solution(layout, self.totals[vector])
+            for vector, layout in self.layouts.items()
+        ]
+        log.debug(
+            "Evaluated %s layouts, pruned %s partial ones",
+            self.best.evaluated,
+            self.best.pruned,
+        )
+        return sorted(solutions, key=lambda _: _.prosperity, reverse=True)
+
+    def _optimistic(self, layout: list[m.TSource], settled: m.Yields) -> Vector | None:
+        """Best possible vector of any layout starting with a partial one, None if capped"""
+        if any(getattr(settled, k) > v for k, v in self.caps.items()):
+            return None
+        start = max(len(layout) - self.reach, 0)
+        remaining = self.remaining()
+        return tuple(
+            (
+                -getattr(settled, _)
+                if _ in MINIMIZED
+                else self.limits[_].partial(layout, remaining, getattr(settled, _), start)
+            )
+            for _ in self.objectives
+        )
+
+    def _discard(self, layout: list[m.TSource], settled: m.Yields) -> bool:
+        optimistic = self._optimistic(layout, settled)
+        if optimistic is None:
+            return True
+        return any(all(map(operator.ge, _, optimistic)) for _ in self.layouts)
+
+    def _evaluate(self, layout: list[m.TSource]) -> None:
+        total = m.World(layout).total(until=self.village)
+        self.best.evaluated += 1
+        if any(getattr(total, k) > v for k, v in self.caps.items()):
+            return
+        vector = self.vector(total)
+        if any(all(map(operator.ge, _, vector)) for _ in self.layouts):
+            return
+        for other in [_ for _ in self.layouts if dominates(vector, _)]:
+            del self.layouts[other]
+            del self.totals[other]
+        self.layouts[vector] = tuple(layout)
+        self.totals[vector] = total
@@ -0,0 +1,134 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Planet: a circular World of biome segments, such as a whole Reus planet
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+
+import typing_extensions as t
+
+from . import model as m
+from . import util as u
+
+__all__ = [
+    "BIOMES",
+    "Segment",
+    "Planet",
+]
+
+log = logging.getLogger(__name__)
+
+BIOMES: tuple[str, ...] = ("ocean", "forest", "desert", "swamp", "mountain")
+
+
+class Segment(t.NamedTuple):
+    """Consecutive tiles of a biome, from start to until (exclusive)"""
+
+    biome: str
+    start: int
+    until: int
+
+    @property
+    def size(self) -> int:
+        return self.until - self.start
+
+
+class Planet(m.World):
+    """Circular layout of Sources, split in biome segments
+
+    The first tile is next to the last one, so ranges and villages wrap around the planet,
+    and tiles can be any integer, as seen from tile 0. Biomes are pairs of name and size,
+    covering the whole layout in order. By default, it is all ocean.
+    Planet-wide counts of sources, see World.count(), are kept updated on every layout
+    change, and sources depending on them, marked as PLANETARY, are re-evaluated by it.
+    Tiles cannot be inserted or removed, as biomes would change.
+    """
+
+    def __init__(
+        self,
+        layout: t.Iterable[m.Source | m.TSource] = (),
+        biomes: t.Iterable[tuple[str, int]] = (),
+    ):
+        super().__init__(layout)
+        size = len(self.sources)
+        self.segments: list[Segment] = []
+        start = 0
+        for biome, length in biomes:
+            if biome not in BIOMES:
+                raise u.ReusError("Biome not found: %s", biome)
+            if length <= 0:
+                raise u.ReusError("Size of %s must be positive: %s", biome, length)
+            self.segments.append(Segment(biome, start, start + length))
+            start += length
+        if not self.segments and size:
+            self.segments.append(Segment(BIOMES[0], 0, size))
+        elif start != size:
+            raise u.ReusError("Biomes cover %s tiles, planet has %s", start, size)
+        self._starts: list[int] = [_.start for _ in self.segments]
+
+    @property
+    def size(self) -> int:
+        return len(self.sources)
+
+    def segment(self, tile: int) -> Segment:
+        """The biome segment of a tile"""
+        if not self.segments:
+            raise u.ReusError("Tile not found: %s", tile)
+        return self.segments[bisect.bisect_right(self._starts, tile % self.size) - 1]
+
+    def biome(self, tile: int) -> str:
+        return self.segment(tile).biome
+
+    def biome_total(self, biome: str) -> m.Yields:
+        """Total yields on all segments of a biome"""
+        return m.Yields.sum(
+            self.total(until=_.until, start=_.start) for _ in self.segments if _.biome == biome
+        )
+
+    def insert(self, tile: int, item: m.Source | m.TSource) -> m.Source:
+        raise u.ReusError("Planet size is fixed, use replace() instead")
+
+    def remove(self, tile: int) -> m.Source:
+        raise u.ReusError("Planet size is fixed, use replace() instead")
+
+    def source(self, tile: int) -> m.Source:
+        if not self.sources:
+            raise u.ReusError("Tile not found: %s", tile)
+        return self.sources[tile % self.size]
+
+    def nearby_sources(
+        self, source: m.Source, matching: m.SourceMatch | None = None, distance: int = 1
+    ) -> list[m.Source]:
+        tile = self.tile(source)
+        sources = [
+            self.sources[_] for _ in sorted(self._nearby_tiles(tile, distance)) if _ != tile
+        ]
+        if matching is not None:
+            sources = [s for s in sources if isinstance(s, matching)]
+        return sources
+
+    def _nearby_tiles(self, tile: int, distance: int) -> t.Iterable[int]:
+        if distance < 0:
+            return set()
+        return {(tile + _) % self.size for _ in range(-distance, distance + 1)}
+
+    def _fold(self, yields: dict[int, m.Yields]) -> dict[int, m.Yields]:
+        # Ranges larger than half the planet reach some tiles twice
+        folded: dict[int, m.Yields] = {}
+        for tile, tile_yields in yields.items():
+            tile %= self.size
+            folded[tile] = folded[tile] + tile_yields if tile in folded else tile_yields
+        return folded
+
+    def _within(self, tile: int, start: int | None, until: int | None) -> bool:
+        if start is None and until is None:
+            return True
+        first = 0 if start is None else start
+        last = self.size if until is None else until
+        if last - first >= self.size:
+            return True
+        return (tile - first) % self.size < last - first
@@ -0,0 +1,205 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Transmutation planner: best order of upgrading sources to their next tier
+"""
+from __future__ import annotations
+
+import dataclasses
+import heapq
+import itertools
+import logging
+import math
+
+import typing_extensions as t
+
+from . import bounds
+from . import gamedata as g
+from . import memo
+from . import model as m
+
+__all__ = [
+    "TIERS",
+    "upgrade",
+    "Plan",
+    "plan",
+]
+
+log = logging.getLogger(__name__)
+
+TIERS: tuple[str, ...] = ("", "Great", "Superior")  # Class name prefixes, in order
+SOURCES: dict[str, m.TSource] = {cls.__name__: cls for cls in m.subclasses(g.Source)}
+NEIGHBOURHOODS = 3**7  # Most tier combinations evaluated around a tile, else its class bound
+
+
+def upgrade(cls: m.TSource) -> m.TSource | None:
+    """Next tier of a Source class, such as GreatTuna for Tuna, if any"""
+    name = cls.__name__
+    prefix = next((_ for _ in TIERS[:0:-1] if name.startswith(_)), TIERS[0])
+    index = TIERS.index(prefix) + 1
+    if index == len(TIERS):
+        return None
+    return SOURCES.get(TIERS[index] + name[len(prefix) :])
+
+
+@dataclasses.dataclass
+class Plan:
+    layout: tuple[m.TSource, ...] = ()  # Initial layout
+    steps: list[int] = dataclasses.field(default_factory=list)  # Upgraded tile each step
+    totals: list[m.Yields] = dataclasses.field(default_factory=list)  # After each step
+    expanded: int = 0  # Layouts whose upgrades were evaluated
+
+    @property
+    def prosperity(self) -> int:
+        """Sum of Prosperity after each step, the one a plan maximizes"""
+        return sum(_.prosperity for _ in self.totals)
+
+    def layouts(self) -> t.Iterator[tuple[m.TSource, ...]]:
+        """Layout after each step"""
+        layout = list(self.layout)
+        for tile in self.steps:
+            upgraded = upgrade(layout[tile])
+            assert upgraded is not None
+            layout[tile] = upgraded
+            yield tuple(layout)
+
+
+def _tiers(cls: m.TSource) -> list[m.TSource]:
+    """A Source class and all its upgrades, in order"""
+    tiers = [cls]
+    after = upgrade(cls)
+    while after is not None:
+        tiers.append(after)
+        after = upgrade(after)
+    return tiers
+
+
+def _latest(tiers: t.Sequence[m.TSource]) -> list[m.TSource]:
+    """Tiers not matched by a later one, as an upgrade subclassing a tier matches all it does"""
+    return [
+        cls
+        for idx, cls in enumerate(tiers)
+        if not any(issubclass(_, cls) for _ in tiers[idx + 1 :])
+    ]
+
+
+def _bounds(tiers: t.Sequence[t.Sequence[m.TSource]], village: int) -> list[list[int]]:
+    """Upper bound of the Prosperity each tile yields on the village, for each of its tiers
+
+    A source only depends on the sources within reach, so it is evaluated among all tier
+    combinations of its neighbourhood, keeping the best for each of its own tiers. As a tile
+    has a single tier at a time, reach comes from pools with only the latest tiers of the
+    other tiles. Tiles with too many combinations are bounded by their class instead.
+    """
+    size = len(tiers)
+    latest = [_latest(_) for _ in tiers]
+    reach = 1 + max(
+        cls.max_range([cls, *(_ for other in latest[:idx] + latest[idx + 1 :] for _ in other)])
+        for idx, tile in enumerate(tiers)
+        for cls in tile
+    )
+    limits = bounds.Bounds([cls for tile in tiers for cls in tile], village, size)
+    scores: list[list[int]] = []
+    for idx, classes in enumerate(tiers):
+        best = {cls: limits.source(cls, idx) for cls in classes}
+        start = max(idx - reach, 0)
+        neighbourhood = tiers[start : idx + reach + 1]
+        if any(best.values()) and math.prod(map(len, neighbourhood)) <= NEIGHBOURHOODS:
+            best = dict.fromkeys(classes, 0)
+            for window in itertools.product(*neighbourhood):
+                source = m.World(window).source(idx - start)
+                score = sum(
+                    yields.prosperity
+                    for tile, yields in source.all_yields(relative=False).items()
+                    if 0 <= tile + start < village
+                )
+                best[type(source)] = max(best[type(source)], score)
+        scores.append(list(best.values()))
+    return scores
+
+
+def _optimistic(options: t.Sequence[t.Sequence[int]], steps: int) -> int:
+    """Upper bound of the sum of scores after each of some steps, one upgrade per step
+
+    Options are the score bounds of each tile for each number of upgrades left to it, in
+    order, starting with none. After each step, the best layout has as many upgrades as
+    steps so far, distributed among tiles, at most one per tier left to them.
+    """
+    # Best sum of tile bounds for each number of upgrades, adding one tile at a time
+    best = [0]
+    for tile in options:
+        combined = [-1] * min(len(best) + len(tile) - 1, steps + 1)
+        for done, score in enumerate(best):
+            for more, value in enumerate(tile[: len(combined) - done]):
+                combined[done + more] = max(combined[done + more], score + value)
+        best = combined
+    return sum(best[1 : steps + 1])
+
+
+def plan(
+    layout: t.Sequence[m.TSource],
+    village: int = 6,
+    steps: int | None = None,
+    cache: memo.LayoutCache | None = None,
+) -> Plan:
+    """Upgrades, one tile per step, giving the most village Prosperity along the way
+
+    Plans are scored by the sum of Prosperity after each step, so early gains count more
+    than late ones. All upgrades are planned, or only the first steps if given.
+    Best-first search: partial plans are expanded by their score so far plus an upper
+    bound of Prosperity on each remaining step, so the first complete plan taken is the
+    best. Layouts are reached by many orders, but each is evaluated and expanded once.
+    Each remaining step is bounded by the layouts with that many more upgrades, each tile
+    by the best it yields with its tier among any tiers of its neighbours.
+    """
+    start = tuple(layout)
+    tiers = [_tiers(cls) for cls in start]
+    available = sum(len(_) - 1 for _ in tiers)
+    steps = available if steps is None else min(steps, available)
+    cache = memo.LayoutCache() if cache is None else cache
+
+    scores = _bounds(tiers, village)
+
+    def heuristic(layout: tuple[m.TSource, ...], remaining: int) -> int:
+        options = [scores[_][tiers[_].index(cls) :] for _, cls in enumerate(layout)]
+        return _optimistic(options, remaining)
+
+    best = Plan(layout=start)
+    counter = itertools.count()  # Tie breaker, so layouts are never compared
+    # Priority, tie breaker, score, layout, steps
+    queue: list[tuple[int, int, int, tuple[m.TSource, ...], tuple[int, ...]]] = [
+        (-heuristic(start, steps), next(counter), 0, start, ())
+    ]
+    expanded: set[tuple[m.TSource, ...]] = set()
+    while queue:
+        _, _, score, current, path = heapq.heappop(queue)
+        if len(path) == steps:
+            best.steps = list(path)
+            best.totals = [cache.total(_, until=village) for _ in best.layouts()]
+            break
+        if current in expanded:
+            continue
+        expanded.add(current)
+        for tile, cls in enumerate(current):
+            upgraded = upgrade(cls)
+            if upgraded is None:
+                continue
+            after = current[:tile] + (upgraded,) + current[tile + 1 :]
+            if after in expanded:
+                continue
+            total = score + cache.total(after, until=village).prosperity
+            remaining = steps - len(path) - 1
+            heapq.heappush(
+                queue,
+                (
+                    -(total + heuristic(after, remaining)),
+                    next(counter),
+                    total,
+                    after,
+                    path + (tile,),
+                ),
+            )
+    best.expanded = len(expanded)
+    log.debug("Expanded %s layouts, evaluated %s", best.expanded, cache.misses)
+    return best
@@ -4,13 +4,23 @@
 # License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
 """
 Available irrigated land (for forests and swamps) based on oceans count and width
-Draft WIP
+
+Each ocean is flanked by 2 forests, each 4 tiles wider than the ocean. For every planet
+size, find the oceans that leave the most forest, writing one line of JSON each.
 """
 from __future__ import annotations
 
+import json
 import logging
+import sys
+
+from . import util as u
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing_extensions as t
 
-from . import util
+__all__ = ["cli", "partition", "solve"]
 
 log = logging.getLogger(__name__)
 
@@ -18,47 +28,135 @@ MIN_SIZE = 6
 # WORLD = 103  # 2 mountains (5) and their deserts (2*14), 1 ocean (9), 2 forests (13), 2 tiles
 WORLD = 100  # 6 * 13 patches, 2 oceans (9 each), 1 mountain (5), -1 desert patch
 
-# def ocean(num, size):
-#     return num * size
-#
-#
-# def forest(num, size):
-#     return 2 * num * (size + 4)
-#
-#
-# def tiles(num, size):
-#     return forest(num, size) + ocean(num, size)
 
+def forest(num: int, ocean: int) -> int:
+    """Forest flanking num oceans totalling ocean tiles, 2 per ocean, each 4 wider"""
+    return 2 * ocean + 8 * num  # == sum((width + 4) * 2 for width in widths)
 
-def forest(num: int, size: float) -> float:
-    return (size + 4) * 2 * num  # == 2 * ocean + 8 * num
 
+def tiles(num: int, ocean: int) -> int:
+    """Tiles used by num oceans totalling ocean tiles, and their forests"""
+    return ocean + forest(num, ocean)  # == 3 * ocean + 8 * num
 
-def tiles(num: int, size: float) -> float:
-    ocean = num * size
-    return ocean + forest(num, size)  # == num * (3 * size + 8)
 
+def partition(ocean: int, num: int) -> list[int]:
+    """Widths of num oceans totalling ocean tiles, as even as possible, widest first"""
+    width, wider = divmod(ocean, num)
+    return [width + 1] * wider + [width] * (num - wider)
 
-def main(total: int) -> None:
-    def width(n: int) -> float:
-        return ((total / n) - 8) / 3  # solving size for num
 
-    max_num = int(total / (3 * MIN_SIZE + 8))  # solving num for size == MIN_SIZE
-    for num in range(1, max_num + 1):
-        s = width(num)
-        for size in (s, int(s), int(s) + 1):
-            log.info(
-                "%2d oceans size %4.1f take %5.1f tiles and yield %5.1f forest",
-                num,
-                size,
-                tiles(num, size),
-                forest(num, size),
-            )
+def solve(
+    until: int,
+    start: int = 1,
+    min_size: int = MIN_SIZE,
+    max_size: int | None = None,
+    min_oceans: int = 1,
+    max_oceans: int | None = None,
+) -> t.Iterator[dict[str, t.Any]]:
+    """Oceans leaving the most forest for each planet size from start to until (inclusive)
+
+    Ties are broken by the most ocean tiles. Sizes without any solution are skipped.
+    Both forest and tiles are linear on the total ocean and its number of oceans, not
+    on their widths, so for each number the best total ocean is the largest that fits,
+    and any split of it within the width limits is as good as the even one.
+    Cost is O(planet sizes * ocean counts).
+    """
+    cost = tiles(1, min_size)  # The narrowest ocean
+    for planet in range(max(start, 0), until + 1):
+        most = planet // cost if max_oceans is None else min(max_oceans, planet // cost)
+        best: tuple[int, int, int] | None = None  # forest, ocean, num
+        for num in range(max(min_oceans, 1), most + 1):
+            ocean = (planet - tiles(num, 0)) // 3  # Largest one within tiles(num, ocean)
+            if max_size is not None:
+                ocean = min(ocean, num * max_size)
+            candidate = (forest(num, ocean), ocean, num)
+            if best is None or candidate > best:
+                best = candidate
+        if best is None:
+            log.debug("No oceans fit a planet of size %s", planet)
+            continue
+        land, ocean, num = best
+        yield {
+            "planet": planet,
+            "oceans": num,
+            "widths": partition(ocean, num),
+            "ocean": ocean,
+            "forest": land,
+            "tiles": tiles(num, ocean),
+            "spare": planet - ocean - land,
+        }
 
 
 def cli(argv: list[str]) -> None:
-    logging.basicConfig(level=logging.INFO)
+    parser = u.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        nargs="?",
+        default=WORLD,
+        type=int,
+        dest="size",
+        metavar="SIZE",
+        help="Planet size, in tiles. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        nargs="?",
+        type=int,
+        dest="until",
+        metavar="UNTIL",
+        help="Solve for all planet sizes from SIZE to UNTIL. [Default: only SIZE]",
+    )
+    parser.add_argument(
+        "--min-size",
+        default=MIN_SIZE,
+        type=int,
+        metavar="WIDTH",
+        help="Minimum width of each ocean. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        metavar="WIDTH",
+        help="Maximum width of each ocean. [Default: no limit]",
+    )
+    parser.add_argument(
+        "--min-oceans",
+        default=1,
+        type=int,
+        metavar="NUM",
+        help="Minimum number of oceans. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "--max-oceans",
+        type=int,
+        metavar="NUM",
+        help="Maximum number of oceans. [Default: no limit]",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="outfile",
+        default="-",
+        type=u.ArgumentParser.FileType("w"),
+        metavar="FILE",
+        help="Output file, one line of JSON for each planet size. [Default: stdout]",
+    )
+
+    args = parser.parse_args(argv[1:])
+    u.setup_logging(level=args.loglevel, fmt="%(levelname)-8s: %(message)s")
+    log.debug(args)
+    if args.max_size is not None and args.max_size < args.min_size:
+        parser.error("--max-size must not be less than --min-size")
+
     try:
-        main(int(argv[1]))
-    except IndexError as e:
-        raise util.ReusError("Usage: reus-realstate NUM") from e
+        for result in solve(
+            args.size if args.until is None else args.until,
+            start=args.size,
+            min_size=args.min_size,
+            max_size=args.max_size,
+            min_oceans=args.min_oceans,
+            max_oceans=args.max_oceans,
+        ):
+            args.outfile.write(json.dumps(result, separators=(",", ":")))
+            args.outfile.write("\n")
+    finally:
+        if args.outfile is not sys.stdout:
+            args.outfile.close()
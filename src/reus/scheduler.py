@@ -0,0 +1,133 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Layered evaluation: one resource at a time, for all sources, in the game's order
+"""
+from __future__ import annotations
+
+import functools
+import logging
+
+import typing_extensions as t
+
+from . import engine
+from . import model as m
+
+__all__ = [
+    "LAYERS",
+    "Scheduler",
+]
+
+log = logging.getLogger(__name__)
+
+T = t.TypeVar("T")
+
+# Evaluation order of resources, after Range. See TODO.md for the game's partial order.
+# Danger before Wealth: White Shark. Wealth before Food: Tuna. Food before Technology:
+# Anglerfish's Weird Deeps. Technology before Awe: Anglerfish's Legendary Proportions.
+# Natura, which comes first, is not a Yields resource yet.
+LAYERS: tuple[str, ...] = ("danger", "gold", "food", "tech", "awe")
+
+
+@functools.lru_cache(maxsize=None)
+def _getters(cls: type, name: str) -> tuple[t.Callable[..., t.Any], ...]:
+    """Getters of a property in each class of a MRO, most derived first
+
+    Cached properties are evaluated keyed by their getter, so these identify the evaluation
+    of a property of a source and of its super() calls.
+    """
+    return tuple(
+        vars(_)[name].fget for _ in cls.__mro__ if isinstance(vars(_).get(name), property)
+    )
+
+
+class Scheduler(engine.Evaluator):
+    """Evaluate a World in resource layers, each one for every source in turn
+
+    Ranges are evaluated first, then each resource in LAYERS order. While evaluating a
+    layer, symbioses reading yields of any source, including their own, get the finished
+    resources of previous layers instead of triggering nested evaluations. Resources of
+    the current and next layers read as zero.
+
+    Sources compute all their yields at once. The ones not reading yields of any source
+    are evaluated once, in the first layer, as their yields are already final. Only the
+    ones reading them, such as Tuna and Anglerfish, are evaluated again on each layer.
+
+    Symbioses reading resources of neighbouring fish, such as Tuna's Growing Hunters and
+    Anglerfish's Weird Deeps, read only the resources produced by those fish, or, with
+    patch, all resources on their tiles, from any source. Tile totals are kept
+    per layer regardless, so both cost the same.
+    """
+
+    def __init__(self, world: m.World, patch: bool = False):
+        super().__init__()
+        self.world: m.World = world
+        self.patch: bool = patch
+        self.sources: dict[m.Source, m.Yields] = {}  # Finished resources of each source
+        self.tiles: dict[int, m.Yields] = {}  # Finished resources on each tile
+        self._root: m.Source | None = None  # Source being evaluated
+        self._read: bool = False  # If it read yields of any source
+        self._depth: int = 0
+
+    def run(self) -> dict[m.Source, m.Yields]:
+        """Yields of each source, also setting tiles. World is not changed"""
+        sources = self.world.sources
+        self.sources = {source: m.Yields() for source in sources}
+        self.clear()
+        original, self.world.engine = self.world.engine, self
+        try:
+            # Ranges, and with them the tiles each source yields on
+            spread: list[list[int]] = []
+            for source in sources:
+                self._root = source
+                spread.append(list(source.all_yields(relative=False)))
+            self.tiles = {tile: m.Yields() for tiles in spread for tile in tiles}
+            final: dict[m.Source, m.Yields] = {}  # Sources not reading any yields
+            for layer in LAYERS:
+                values: list[int] = []
+                for source in sources:
+                    yields = final.get(source)
+                    if yields is None:
+                        self._root, self._read = source, False
+                        yields = source.yields
+                        if not self._read:
+                            final[source] = yields
+                    values.append(getattr(yields, layer))
+                for source, tiles, value in zip(sources, spread, values):
+                    setattr(self.sources[source], layer, value)
+                    for tile in tiles:
+                        yields = self.tiles[tile]
+                        setattr(yields, layer, getattr(yields, layer) + value)
+        finally:
+            self._root = None
+            self.world.engine = original
+        return self.sources
+
+    def evaluate(
+        self,
+        owner: t.Hashable,
+        key: t.Hashable,
+        seed: t.Callable[[], T] | None,
+        func: t.Callable[..., T],
+        *args: t.Any,
+        **kwargs: t.Any,
+    ) -> T:
+        cls: type = type(owner)
+        if key in _getters(cls, "range"):
+            # Final before any resource, so cached as usual
+            return super().evaluate(owner, key, seed, func, *args, **kwargs)
+        if self._depth and isinstance(owner, m.Source) and key is _getters(cls, "yields")[0]:
+            # Yields of a source, not a super() call in its class hierarchy
+            self._read = True
+            if self.patch and owner is not self._root:
+                finished: t.Any = self.tiles.get(self.world.tile(owner), m.Yields())
+            else:
+                finished = self.sources[owner]
+            return t.cast(T, m.Yields(*finished))
+
+        self._depth += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._depth -= 1
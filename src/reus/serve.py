@@ -0,0 +1,297 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Local evaluation server, keeping caches warm across requests
+
+Requests and responses are JSON objects, one per line, over a Unix socket or a localhost
+TCP port. Each request has an "op", and an optional "id" echoed in its response:
+  {"op": "evaluate", "layout": "@ Seabass Clown Parrot ] Mack", "range": 6}
+  {"op": "optimize", "fish": "Seabass Seabass Clown Tuna", "size": 3, "range": 6}
+  {"op": "stats"}
+Responses have either a "result", as in batch mode and --optimize, or an "error".
+Evaluations run in a pool of worker processes, so the server keeps answering while they
+run, and their results are cached by the server, so repeated ones never reach the pool.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import functools
+import json
+import logging
+
+import typing_extensions as t
+
+from . import batch
+from . import memo
+from . import model as m
+from . import notation
+from . import optimizer
+from . import store as s
+from . import util as u
+
+__all__ = [
+    "HOST",
+    "PORT",
+    "Server",
+    "cli",
+]
+
+log = logging.getLogger(__name__)
+
+HOST = "127.0.0.1"  # Local only, never expose it to other hosts
+PORT = 8765
+VILLAGE_RANGE = 6
+
+
+def _layout(request: dict[str, t.Any], field: str) -> tuple[list[m.TSource], int, int | None]:
+    """Layout, village start and end from a request field, as notation.parse()"""
+    value = request.get(field)
+    if isinstance(value, str):
+        value = value.split()
+    if not isinstance(value, list) or not value:
+        raise u.ReusError("Field %r must be a non-empty string or list of fish names", field)
+    layout, start, until = notation.parse(map(str, value))
+    return layout, start or 0, until
+
+
+def _integer(request: dict[str, t.Any], field: str) -> int | None:
+    """Integer value of a request field, None if missing or null"""
+    value = request.get(field)
+    if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+        raise u.ReusError("Field %r must be an integer: %r", field, value)
+    return value
+
+
+def _range(request: dict[str, t.Any]) -> int:
+    """Village range of a request, the default if missing or null"""
+    value = _integer(request, "range")
+    if value is None:
+        return VILLAGE_RANGE
+    if value < 1:
+        raise u.ReusError("Field 'range' must be at least 1: %r", value)
+    return value
+
+
+class Server:
+    """Evaluation and optimization requests, answered from cache or by a process pool
+
+    Village evaluations are cached by memo.LayoutCache, optimizer results by their
+    pool of fish, size and village range. Both are also saved to a persistent store,
+    if any, which is then used by the server process only.
+    """
+
+    def __init__(
+        self,
+        jobs: int | None = None,
+        cache_size: int = memo.MAXSIZE,
+        patch: bool = False,
+        store: s.Store | None = None,
+    ):
+        self.cache: memo.LayoutCache = memo.LayoutCache(
+            maxsize=cache_size, patch=patch, store=store
+        )
+        self.store: s.Store | None = store
+        self.searches: dict[tuple[str, int, int], dict[str, t.Any]] = {}
+        self.requests: int = 0
+        self.executor: concurrent.futures.Executor = concurrent.futures.ProcessPoolExecutor(
+            jobs or None
+        )
+
+    async def _run(self, func: t.Callable[..., t.Any], *args: t.Any, **kwargs: t.Any) -> t.Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def handle(self, request: dict[str, t.Any]) -> dict[str, t.Any]:
+        """Response to a request, with its result or error"""
+        self.requests += 1
+        response: dict[str, t.Any] = {"id": request["id"]} if "id" in request else {}
+        op = request.get("op")
+        try:
+            if op == "evaluate":
+                response["result"] = await self.evaluate(request)
+            elif op == "optimize":
+                response["result"] = await self.optimize(request)
+            elif op == "stats":
+                response["result"] = self.stats()
+            else:
+                raise u.ReusError("Operation not found: %r", op)
+        except u.ReusError as e:
+            response["error"] = str(e)
+        except Exception as e:
+            # Never drop the client, whatever went wrong here or in a worker
+            log.exception("Failed request: %r", request)
+            response["error"] = f"Internal error: {e!r}"
+        return response
+
+    async def evaluate(self, request: dict[str, t.Any]) -> dict[str, t.Any]:
+        layout, start, until = _layout(request, "layout")
+        if until is None:
+            until = start + _range(request)
+        cached = self.cache.get(layout, until, start)
+        if cached is None:
+            tiles = await self._run(
+                memo.village, layout, until=until, start=start, patch=self.cache.patch
+            )
+            cached = self.cache.add(layout, until, start, tiles)
+        return batch.result(layout, until, start, *cached)
+
+    async def optimize(self, request: dict[str, t.Any]) -> dict[str, t.Any]:
+        if self.cache.patch:
+            raise u.ReusError("Patch mode is not supported by optimize")
+        pool, start, until = _layout(request, "fish")
+        if start:
+            raise u.ReusError("Village must start at the first tile for optimize")
+        size = _integer(request, "size")
+        village = until if until is not None else _range(request)
+        search = optimizer.Search(pool, size=size, village=village)  # Validates arguments
+        key = (s.signature(pool), search.size, village)
+        if key in self.searches:
+            return self.searches[key]
+
+        layout = None if self.store is None else self.store.search(pool, search.size, village)
+        if layout is None:
+            solution: optimizer.Solution = await self._run(
+                optimizer.optimize, pool, size=size, village=village
+            )
+            layout = list(solution.layout)
+            if self.store is not None:
+                self.store.add_search(pool, search.size, village, layout)
+        evaluated = await self.evaluate(
+            {"layout": [_.__name__ for _ in layout], "range": village}
+        )
+        self.searches[key] = evaluated
+        return evaluated
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "cached": len(self.cache),
+            "hits": self.cache.hits,
+            "loaded": self.cache.loaded,
+            "misses": self.cache.misses,
+            "searches": len(self.searches),
+        }
+
+    async def connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer requests from a client, in order, until it disconnects"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("not an object")
+                except ValueError as e:
+                    response: dict[str, t.Any] = {"error": f"Invalid request: {e}"}
+                else:
+                    response = await self.handle(request)
+                writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError as e:
+            log.debug("Client disconnected: %s", e)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def start(
+        self, path: str | None = None, host: str = HOST, port: int = PORT
+    ) -> asyncio.AbstractServer:
+        """Start listening on a Unix socket path, or on a host TCP port"""
+        # Workers are forked at once, but only when needed. Do it now, so they do not
+        # inherit client sockets, which would then not close when the server closes them
+        await self._run(int)
+        if path is not None:
+            server = await asyncio.start_unix_server(self.connection, path=path)
+        else:
+            server = await asyncio.start_server(self.connection, host=host, port=port)
+        log.info("Listening on %s", path or f"{host}:{port}")
+        return server
+
+    async def serve(self, path: str | None = None, host: str = HOST, port: int = PORT) -> None:
+        """Start listening and answer requests forever"""
+        server = await self.start(path, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self) -> t.Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def cli(argv: list[str]) -> None:
+    parser = u.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-S",
+        "--socket",
+        dest="path",
+        metavar="PATH",
+        help="Unix socket to listen on, instead of a TCP port.",
+    )
+    parser.add_argument(
+        "--host",
+        default=HOST,
+        help="Host address to listen on. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "--port",
+        default=PORT,
+        type=int,
+        help="TCP port to listen on. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        default=0,
+        type=int,
+        metavar="N",
+        help="Number of worker processes, 0 for all CPUs. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "-c",
+        "--cache",
+        dest="cache_size",
+        default=memo.MAXSIZE,
+        type=int,
+        metavar="SIZE",
+        help="Number of recent layouts to remember. [Default: %(default)s]",
+    )
+    parser.add_argument(
+        "-p",
+        "--patch",
+        default=False,
+        action="store_true",
+        help="Tuna and Anglerfish symbioses count all resources on neighbouring patches.",
+    )
+    parser.add_argument(
+        "-s",
+        "--store",
+        metavar="DATABASE",
+        help="SQLite database file to save evaluated layouts and searches.",
+    )
+
+    args = parser.parse_args(argv[1:])
+    u.setup_logging(level=args.loglevel, fmt="%(levelname)-8s: %(message)s")
+    log.debug(args)
+
+    database = None if args.store is None else s.Store(args.store)
+    try:
+        with Server(args.jobs, args.cache_size, args.patch, database) as server:
+            asyncio.run(server.serve(args.path, args.host, args.port))
+    finally:
+        if database is not None:
+            database.close()
@@ -0,0 +1,196 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Persistent store of evaluated layouts and optimizer results, using SQLite
+"""
+from __future__ import annotations
+
+import collections
+import json
+import logging
+import sqlite3
+
+import typing_extensions as t
+
+from . import gamedata as g
+from . import memo
+from . import model as m
+
+__all__ = [
+    "signature",
+    "Store",
+]
+
+log = logging.getLogger(__name__)
+
+COMMIT_EVERY = 1000  # Pending additions before committing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS layouts (
+    layout      TEXT    NOT NULL,  -- Canonical layout, see memo.canonical()
+    start       INTEGER NOT NULL,
+    until       INTEGER NOT NULL,
+    patch       INTEGER NOT NULL,
+    signature   TEXT    NOT NULL,  -- Species counts
+    food        INTEGER NOT NULL,
+    gold        INTEGER NOT NULL,
+    tech        INTEGER NOT NULL,
+    awe         INTEGER NOT NULL,
+    danger      INTEGER NOT NULL,
+    prosperity  INTEGER NOT NULL,
+    tiles       TEXT    NOT NULL,  -- JSON list of Yields values of each village tile
+    PRIMARY KEY (layout, start, until, patch)
+);
+CREATE INDEX IF NOT EXISTS layouts_best
+    ON layouts (signature, start, until, patch, prosperity DESC);
+CREATE INDEX IF NOT EXISTS layouts_prosperity
+    ON layouts (prosperity DESC);
+CREATE TABLE IF NOT EXISTS searches (
+    pool        TEXT    NOT NULL,  -- Species counts of available sources
+    size        INTEGER NOT NULL,
+    village     INTEGER NOT NULL,
+    layout      TEXT    NOT NULL,  -- Best layout, as found
+    PRIMARY KEY (pool, size, village)
+);
+"""
+
+SOURCES: dict[str, m.TSource] = {cls.__name__: cls for cls in m.subclasses(g.Source)}
+
+
+def signature(layout: t.Iterable[m.TSource]) -> str:
+    """Species counts of a layout, regardless of order, such as 'Seabass=2 Tuna=1'"""
+    counts = collections.Counter(_.__name__ for _ in layout)
+    return " ".join(f"{name}={counts[name]}" for name in sorted(counts))
+
+
+def _encode(layout: t.Iterable[m.TSource]) -> str:
+    return " ".join(_.__name__ for _ in layout)
+
+
+def _decode(text: str) -> list[m.TSource]:
+    return [SOURCES[_] for _ in text.split()]
+
+
+class Store:
+    """Evaluated villages and best layouts found by the optimizer, saved to disk
+
+    Layouts are stored in canonical form, so mirrored ones are found too. Queries by
+    species counts and village are answered from an index, best Prosperity first.
+    Usable as a context manager, committing and closing on exit.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path: str = path
+        self.db: sqlite3.Connection = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self._pending: int = 0
+
+    def village(
+        self, layout: t.Sequence[m.TSource], until: int, start: int = 0, patch: bool = False
+    ) -> tuple[list[m.Yields], m.Yields] | None:
+        """Stored yields of each village tile and their total, as memo.village()"""
+        (canonical, cstart, cuntil), mirrored = memo.canonical(layout, until, start)
+        row = self.db.execute(
+            "SELECT tiles, food, gold, tech, awe, danger FROM layouts"
+            " WHERE layout = ? AND start = ? AND until = ? AND patch = ?",
+            (_encode(canonical), cstart, cuntil, patch),
+        ).fetchone()
+        if row is None:
+            return None
+        tiles = [m.Yields(*_) for _ in json.loads(row[0])]
+        return (tiles[::-1] if mirrored else tiles), m.Yields(*row[1:])
+
+    def add(
+        self,
+        layout: t.Sequence[m.TSource],
+        until: int,
+        start: int,
+        tiles: t.Sequence[m.Yields],
+        patch: bool = False,
+    ) -> None:
+        """Save the yields of each village tile of a layout, if not already saved"""
+        (canonical, cstart, cuntil), mirrored = memo.canonical(layout, until, start)
+        total = m.Yields.sum(tiles)
+        self.db.execute(
+            "INSERT OR IGNORE INTO layouts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                _encode(canonical),
+                cstart,
+                cuntil,
+                patch,
+                signature(layout),
+                *total,
+                total.prosperity,
+                json.dumps([tuple(_) for _ in (tiles[::-1] if mirrored else tiles)]),
+            ),
+        )
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.commit()
+
+    def best(
+        self,
+        species: t.Iterable[m.TSource],
+        until: int,
+        start: int = 0,
+        patch: bool = False,
+    ) -> tuple[list[m.TSource], m.Yields] | None:
+        """Best known layout of a multiset of sources for a village, and its total"""
+        pool = list(species)
+        size = len(pool)
+        row = self.db.execute(
+            "SELECT layout, start, until, food, gold, tech, awe, danger FROM layouts"
+            " WHERE signature = ? AND patch = ?"
+            " AND ((start = ? AND until = ?) OR (start = ? AND until = ?))"
+            " ORDER BY prosperity DESC LIMIT 1",
+            (signature(pool), patch, start, until, size - until, size - start),
+        ).fetchone()
+        if row is None:
+            return None
+        layout = _decode(row[0])
+        if (row[1], row[2]) != (start, until):
+            layout.reverse()
+        return layout, m.Yields(*row[3:])
+
+    def search(
+        self, pool: t.Iterable[m.TSource], size: int, village: int
+    ) -> list[m.TSource] | None:
+        """Best layout found by a previous optimizer search, if any"""
+        row = self.db.execute(
+            "SELECT layout FROM searches WHERE pool = ? AND size = ? AND village = ?",
+            (signature(pool), size, village),
+        ).fetchone()
+        return None if row is None else _decode(row[0])
+
+    def add_search(
+        self,
+        pool: t.Iterable[m.TSource],
+        size: int,
+        village: int,
+        layout: t.Sequence[m.TSource],
+    ) -> None:
+        """Save the best layout found by an optimizer search"""
+        self.db.execute(
+            "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)",
+            (signature(pool), size, village, _encode(layout)),
+        )
+        self.commit()
+
+    def commit(self) -> None:
+        self.db.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.commit()
+        self.db.close()
+
+    def __len__(self) -> int:
+        count: int = self.db.execute("SELECT COUNT(*) FROM layouts").fetchone()[0]
+        return count
+
+    def __enter__(self) -> t.Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
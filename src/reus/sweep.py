@@ -0,0 +1,78 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Village totals for every start and range, from a single evaluation
+"""
+from __future__ import annotations
+
+import logging
+
+import typing_extensions as t
+
+from . import model as m
+from . import scheduler
+
+__all__ = ["Sweep"]
+
+log = logging.getLogger(__name__)
+
+
+class Sweep:
+    """Prefix sums of the yields of all tiles of a World, evaluated once
+
+    Total of any village is then a single subtraction, regardless of its range.
+    The World is not kept, so later layout changes require a new Sweep. Patch mode is
+    as in scheduler.Scheduler.
+    """
+
+    def __init__(self, world: m.World, patch: bool = False):
+        if patch:
+            layers = scheduler.Scheduler(world, patch=True)
+            layers.run()
+            tiles = layers.tiles
+        else:
+            tiles = world.tile_yields()
+        self.first: int = min(tiles, default=0)  # First tile with any yields
+        self.last: int = max(tiles, default=-1) + 1  # Tile after the last one
+        self.prefix: list[m.Yields] = [m.Yields()]  # Total of all tiles before each one
+        for tile in range(self.first, self.last):
+            self.prefix.append(self.prefix[-1] + tiles.get(tile, m.Yields()))
+
+    def _index(self, tile: int) -> int:
+        return min(max(tile - self.first, 0), len(self.prefix) - 1)
+
+    def total(self, until: int, start: int = 0) -> m.Yields:
+        """Total yields of tiles from start to until (exclusive), as World.total()"""
+        if until <= start:
+            return m.Yields()
+        return self.prefix[self._index(until)] - self.prefix[self._index(start)]
+
+    def totals(
+        self, ranges: t.Iterable[int] | None = None, starts: t.Iterable[int] | None = None
+    ) -> dict[tuple[int, int], m.Yields]:
+        """Total of each village, by (start, range)
+
+        By default, all ranges and starts of villages within tiles with yields.
+        """
+        size = self.last - self.first
+        ranges = range(1, size + 1) if ranges is None else list(ranges)
+        result: dict[tuple[int, int], m.Yields] = {}
+        for village in ranges:
+            tiles = range(self.first, self.last - village + 1) if starts is None else starts
+            for start in tiles:
+                result[start, village] = self.total(start + village, start)
+        return result
+
+    def best(
+        self, ranges: t.Iterable[int] | None = None, starts: t.Iterable[int] | None = None
+    ) -> dict[int, tuple[int, m.Yields]]:
+        """Start and total of the village with the highest Prosperity for each range
+
+        Ties are broken by the first start.
+        """
+        result: dict[int, tuple[int, m.Yields]] = {}
+        for (start, village), total in self.totals(ranges, starts).items():
+            if village not in result or total.prosperity > result[village][1].prosperity:
+                result[village] = (start, total)
+        return result
@@ -7,13 +7,14 @@ General utilities
 from __future__ import annotations
 
 import argparse
+import atexit
 import logging
-import pprint
+import os
 
-import typing_extensions as t
-
-if t.TYPE_CHECKING:
-    import os
+# Not imported at runtime, for a fast startup. See main.py
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing_extensions as t
 
     PathLike: t.TypeAlias = t.Union[str, bytes, os.PathLike]
 
@@ -22,6 +23,10 @@ log: logging.Logger = logging.getLogger(__name__)
 Data = argparse.Namespace
 Data.__doc__ = "Simple and untyped dataclass for disposable data"
 
+# Environment variable enabling --profile. Here, not in instrument, for a fast startup
+PROFILE_ENVIRON = "REUS_PROFILE"
+TRUTHY: tuple[str, ...] = ("1", "true", "yes", "on")  # Environment values, case-insensitive
+
 
 # For ArgumentParser.epilog
 COPYRIGHT = """
@@ -46,9 +51,16 @@ def printf(msg: object = "", *args: object) -> None:
     if args or isinstance(msg, str):
         print((str(msg) % args) if args else msg)
     else:
+        import pprint  # Slow to import, and only needed for objects
+
         pprint.pprint(msg)
 
 
+def environ_flag(name: str) -> bool:
+    """If an environment variable is set to a TRUTHY value, so 0 or false are not"""
+    return os.environ.get(name, "").strip().lower() in TRUTHY
+
+
 def setup_logging(
     level: int = logging.INFO,
     fmt: str = "[%(asctime)s %(levelname)-6.6s] %(module)-4s: %(message)s",
@@ -74,9 +86,7 @@ def setup_logging(
 
 
 class ArgumentParser(argparse.ArgumentParser):
-    __doc__ = (
-        (argparse.ArgumentParser.__doc__ or "")
-        + """
+    __doc__ = (argparse.ArgumentParser.__doc__ or "") + """
     Changes:
     - description -- Only first non-blank line is considered, unless
         multiline is True.
@@ -93,6 +103,10 @@ class ArgumentParser(argparse.ArgumentParser):
         attribute automatically created by parse_args() and set to True when
         the above loglevel is <logging.DEBUG> (i.e, when '-v|--verbose' is
         parsed). If empty, no such attribute is created. (default: "debug")
+    - profile_option -- dest of a pre-created --profile option, that when set, or
+        when REUS_PROFILE environment variable is TRUTHY, enables the instrument
+        module on parse_args() and reports its stats on exit. If empty, no such
+        option is created. (default: "profile")
     - version
     Additions:
     FileType -- convenience class attribute, an alias to argparse.FileType
@@ -111,7 +125,6 @@ class ArgumentParser(argparse.ArgumentParser):
         https://github.com/python/cpython/issues/58364
         https://docs.python.org/3/library/sys.html#sys.stdin
     """
-    )
     FileType = argparse.FileType
 
     def __init__(
@@ -120,6 +133,7 @@ class ArgumentParser(argparse.ArgumentParser):
         multiline: bool = False,
         loglevel_options: str = "loglevel",
         debug_option: str = "debug",
+        profile_option: str = "profile",
         version: t.Optional[str] = None,
         **kwargs: t.Any,
     ):
@@ -137,6 +151,7 @@ class ArgumentParser(argparse.ArgumentParser):
 
         self.loglevel_options = loglevel_options
         self.debug_option = debug_option
+        self.profile_option = profile_option
 
         if self.loglevel_options:
             group = self.add_mutually_exclusive_group()
@@ -158,6 +173,17 @@ class ArgumentParser(argparse.ArgumentParser):
                 help="Verbose mode, output extra info.",
             )
 
+        if self.profile_option:
+            self.add_argument(
+                "--profile",
+                dest=self.profile_option,
+                default=environ_flag(PROFILE_ENVIRON),
+                action="store_true",
+                help="Report call counts, time and cache hits of evaluations on exit."
+                f" Also enabled by the {PROFILE_ENVIRON} environment variable set to 1,"
+                " true or yes.",
+            )
+
         if version:
             self.add_argument(
                 "-V",
@@ -177,4 +203,9 @@ class ArgumentParser(argparse.ArgumentParser):
                 self.debug_option,
                 getattr(arguments, self.loglevel_options) == logging.DEBUG,
             )
+        if self.profile_option and getattr(arguments, self.profile_option):
+            from . import instrument
+
+            instrument.enable()
+            atexit.register(instrument.report)
         return arguments
@@ -0,0 +1,277 @@
+# This file is part of Reus, see <https://github.com/MestreLion/reus>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+"""
+Batch evaluation of many fish layouts at once using NumPy
+
+Requires the 'numpy' extra: pip install reus[numpy]
+Layouts are integer arrays of species indexes, shaped (batch, tile), and yields are
+arrays shaped (batch, tile, resource), resources in the same order as Yields fields.
+The object model in model.World remains the reference implementation.
+"""
+from __future__ import annotations
+
+import logging
+
+import typing_extensions as t
+
+try:
+    import numpy as np
+    import numpy.typing as npt
+except ImportError as e:  # pragma: no cover
+    raise ImportError(f"{__name__} requires NumPy: pip install reus[numpy]") from e
+
+from . import gamedata as g
+from . import model as m
+from . import util as u
+
+__all__ = [
+    "Array",
+    "BatchEvaluator",
+]
+
+log = logging.getLogger(__name__)
+
+Array: t.TypeAlias = "npt.NDArray[np.int64]"
+Mask: t.TypeAlias = "npt.NDArray[np.bool_]"
+FIELDS: tuple[str, ...] = tuple(vars(m.Yields()))  # Resources, in Yields order
+RESOURCES: int = len(FIELDS)
+
+
+class BatchEvaluator:
+    """Evaluate batches of layouts of a fixed set of species
+
+    Reproduces all fish symbioses in gamedata. Self-referencing ones, White Shark's Hunted
+    and Anglerfish's Legendary Proportions, use the resources from all its other yields.
+    """
+
+    def __init__(self, species: t.Iterable[m.TSource]):
+        self.species: list[m.TSource] = list(species)
+        supported = set(m.subclasses(g.Fish))
+        for cls in self.species:
+            if cls not in supported:
+                raise u.ReusError("No batch evaluation for %s", cls.__name__)
+        self.index: dict[m.TSource, int] = {cls: i for i, cls in enumerate(self.species)}
+        self.kinds: list[str] = sorted(set(cls.species() for cls in self.species))
+
+    # Encoding -------------------------------------------------------------
+
+    def encode(self, layouts: t.Iterable[t.Sequence[m.TSource]]) -> Array:
+        """Layouts of same size as a (batch, tile) array of species indexes"""
+        try:
+            return np.array([[self.index[cls] for cls in _] for _ in layouts], dtype=np.int64)
+        except KeyError as e:
+            raise u.ReusError("Species not in evaluator: %s", e) from e
+
+    def decode(self, layouts: Array) -> list[tuple[m.TSource, ...]]:
+        return [tuple(self.species[_] for _ in row) for row in layouts.tolist()]
+
+    # Per-species tables ---------------------------------------------------
+
+    def _is(self, layouts: Array, matching: m.SourceMatch) -> Mask:
+        table = np.array([issubclass(cls, matching) for cls in self.species], dtype=bool)
+        return table[layouts]
+
+    def _table(self, layouts: Array, matching: m.TSource, attr: str) -> Array:
+        """Per-tile class constant Yields, zero for sources not matching"""
+        table = np.zeros((len(self.species), RESOURCES), dtype=np.int64)
+        for i, cls in enumerate(self.species):
+            if issubclass(cls, matching):
+                table[i] = tuple(getattr(cls, attr))
+        return table[layouts]
+
+    def _param(
+        self, layouts: Array, matching: m.TSource, getter: t.Callable[[t.Any], t.Any]
+    ) -> t.Any:
+        """Per-tile numeric class constant, zero for sources not matching"""
+        table = np.array(
+            [getter(cls) if issubclass(cls, matching) else 0 for cls in self.species]
+        )
+        return table[layouts]
+
+    # Neighbourhoods -------------------------------------------------------
+
+    @staticmethod
+    def _count(mask: Mask, distance: Array | int) -> Array:
+        """Number of tiles matching a mask within a distance of each tile, excluding it"""
+        batch, size = mask.shape
+        csum = np.zeros((batch, size + 1), dtype=np.int64)
+        np.cumsum(mask, axis=1, out=csum[:, 1:])
+        tiles = np.arange(size)
+        lo = np.broadcast_to(np.clip(tiles - distance, 0, size), mask.shape)
+        hi = np.broadcast_to(np.clip(tiles + distance + 1, 0, size), mask.shape)
+        count = np.take_along_axis(csum, hi, axis=1) - np.take_along_axis(csum, lo, axis=1)
+        return count - mask  # type: ignore[no-any-return]
+
+    def _kinds(self, layouts: Array, distance: Array) -> Array:
+        """Number of different kinds of other fish within a distance of each tile"""
+        kinds = np.zeros(layouts.shape, dtype=np.int64)
+        for kind in self.kinds:
+            matching = tuple(c for c in self.species if c.species() == kind)
+            mask = self._is(layouts, matching) & self._is(layouts, g.Fish)
+            kinds += self._count(mask, distance) > 0
+        return kinds
+
+    @staticmethod
+    def _neighbours(yields: Array, mask: Mask) -> Array:
+        """Sum of yields of both neighbours of each tile, if they match a mask"""
+        masked = yields * mask[..., np.newaxis]
+        total = np.zeros_like(yields)
+        total[:, 1:] += masked[:, :-1]
+        total[:, :-1] += masked[:, 1:]
+        return total
+
+    # Evaluation -----------------------------------------------------------
+
+    def ranges(self, layouts: Array) -> Array:
+        """Range of each source, shaped (batch, tile)"""
+        ranges: Array = self._param(layouts, g.Animal, lambda cls: cls.RANGE).astype(np.int64)
+
+        # Massive School, iterating just like Mackerel does
+        mackerel = self._is(layouts, g.Mackerel)
+        top = self._param(layouts, g.Mackerel, lambda cls: cls.SYMB.max)
+        per = self._param(layouts, g.Mackerel, lambda cls: cls.SYMB.bonus)
+        bonus = np.zeros(layouts.shape, dtype=np.int64)
+        done = ~mackerel
+        for i in range(int(top.max(initial=0))):
+            new = np.minimum(top, per * self._count(mackerel, ranges + bonus))
+            bonus = np.where(done, bonus, new)
+            done |= (bonus == 0) | (bonus == top) | (i + 1 >= top)
+        ranges += bonus
+
+        # Great Voyage
+        ranges += np.where(
+            self._voyager(layouts),
+            self._param(layouts, g.BlueWhale, lambda cls: cls.GREAT_VOYAGE.range),
+            0,
+        )
+        return ranges
+
+    def _voyager(self, layouts: Array) -> Mask:
+        """Blue Whales with no neighbouring Natural Sources"""
+        sources = self._is(layouts, (g.Mineral, g.Plant, g.Animal))
+        voyager: Mask = self._is(layouts, g.BlueWhale) & (self._count(sources, 1) == 0)
+        return voyager
+
+    def yields(self, layouts: Array, ranges: Array | None = None) -> Array:
+        """Yields of each source on its own tile, shaped (batch, tile, resource)"""
+        if ranges is None:
+            ranges = self.ranges(layouts)
+        yields = self._table(layouts, g.Fish, "BASE")
+        resource = {name: i for i, name in enumerate(FIELDS)}
+
+        def when(condition: Mask) -> Mask:
+            return condition[..., np.newaxis]
+
+        def times(count: Array) -> Array:
+            return count[..., np.newaxis]
+
+        # Coral Dweller
+        yields += self._table(layouts, g.Clownfish, "SYMB") * when(
+            self._count(self._is(layouts, (g.Clownfish, g.Parrotfish)), 1) > 0
+        )
+        # Barrier Dweller, both Parrotfish and Dolphin
+        kinds = times(self._kinds(layouts, ranges))
+        yields += self._table(layouts, g.Parrotfish, "SYMB") * kinds
+        yields += self._table(layouts, g.Dolphin, "SYMB") * kinds
+        # Predator
+        yields += self._table(layouts, g.Seabass, "SYMB") * when(
+            self._count(self._is(layouts, (g.Mackerel, g.Clownfish)), ranges) > 0
+        )
+        # Vigorous and Huge Specimen
+        yields += self._table(layouts, g.Marlin, "VIGOROUS_SPECIMEN") * times(
+            self._count(self._is(layouts, g.Seabass), ranges)
+        )
+        yields += self._table(layouts, g.Marlin, "HUGE_SPECIMEN") * times(
+            self._count(self._is(layouts, g.Parrotfish), ranges)
+        )
+        # Great Voyage and Majesty
+        voyage = np.zeros_like(yields)
+        for i, cls in enumerate(self.species):
+            if issubclass(cls, g.BlueWhale):
+                voyage[layouts == i] = tuple(cls.GREAT_VOYAGE.bonus)
+        yields += voyage * when(self._voyager(layouts))
+        yields += self._table(layouts, g.BlueWhale, "MAJESTY") * times(
+            self._count(self._is(layouts, (g.Tuna, g.Seabass, g.Mackerel)), ranges)
+        )
+        # Pod
+        yields += self._table(layouts, g.Dolphin, "POD") * when(
+            self._count(self._is(layouts, (g.Parrotfish, g.Dolphin)), 1) > 0
+        )
+        # Deep Sea Killer, then Hunted using the Danger on this White Shark
+        yields += self._table(layouts, g.WhiteShark, "DEEP_SEA_KILLER") * times(
+            self._count(self._is(layouts, (g.WhiteShark, g.Marlin)), ranges)
+        )
+        shark = self._is(layouts, g.WhiteShark)
+        per_danger = np.maximum(
+            self._param(layouts, g.WhiteShark, lambda c: c.HUNTED.per_danger), 1
+        )
+        yields[..., resource["gold"]] += np.where(
+            shark,
+            self._param(layouts, g.WhiteShark, lambda c: c.HUNTED.gold)
+            - yields[..., resource["danger"]] // per_danger,
+            0,
+        )
+
+        # Neighbours' yields are now final, as no fish above depends on Tuna or Anglerfish
+        # Growing Hunters and Territorial
+        tuna = self._is(layouts, g.Tuna)
+        gold = self._neighbours(
+            yields, self._is(layouts, (g.Clownfish, g.Parrotfish, g.Marlin))
+        )
+        per_gold = np.maximum(
+            self._param(layouts, g.Tuna, lambda c: c.GROWING_HUNTERS.per_gold), 1
+        )
+        factor = self._param(layouts, g.Tuna, lambda c: c.GROWING_HUNTERS.food_factor)
+        food = np.trunc((gold[..., resource["gold"]] // per_gold) * factor).astype(np.int64)
+        territorial = self._table(layouts, g.Tuna, "TERRITORIAL") * when(
+            self._count(tuna, ranges) == 0
+        )
+        # Weird Deeps, then Legendary Proportions using the Technology on this Anglerfish
+        angler = self._is(layouts, g.Anglerfish)
+        food_nb = self._neighbours(yields, self._is(layouts, (g.Mackerel, g.Seabass, g.Marlin)))
+        per_food = np.maximum(
+            self._param(layouts, g.Anglerfish, lambda c: c.WEIRD_DEEPS.per_food), 1
+        )
+        factor = self._param(layouts, g.Anglerfish, lambda c: c.WEIRD_DEEPS.tech_factor)
+        tech = np.trunc(factor * (food_nb[..., resource["food"]] // per_food)).astype(np.int64)
+
+        yields[..., resource["food"]] += np.where(tuna, food, 0)
+        yields += territorial
+        yields[..., resource["tech"]] += np.where(angler, tech, 0)
+        legendary = np.zeros_like(yields)
+        minimum = self._param(layouts, g.Anglerfish, lambda c: c.LEGENDARY_PROPORTIONS.min_tech)
+        for i, cls in enumerate(self.species):
+            if issubclass(cls, g.Anglerfish):
+                legendary[layouts == i] = tuple(cls.LEGENDARY_PROPORTIONS.bonus)
+        yields += legendary * when(angler & (yields[..., resource["tech"]] >= minimum))
+        return yields
+
+    def all_yields(self, layouts: Array, until: int | None = None, start: int = 0) -> Array:
+        """Yields on each tile from start to until (exclusive), shaped (batch, tile, resource)
+
+        Just like World.all_yields(), but default until is the ocean size,
+        and tiles with no yields are included as zeros.
+        """
+        batch, size = layouts.shape
+        until = size if until is None else until
+        ranges = self.ranges(layouts)
+        yields = self.yields(layouts, ranges)
+        total = np.zeros((batch, max(until - start, 0), RESOURCES), dtype=np.int64)
+        for distance in range(-int(ranges.max(initial=0)), int(ranges.max(initial=0)) + 1):
+            # Sources yielding on a tile "distance" away from them
+            sources = yields * (ranges >= abs(distance))[..., np.newaxis]
+            # source tile + distance = target tile, for target tiles within [start, until)
+            lo, hi = max(start, distance), min(until, size + distance)
+            if lo < hi:
+                total[:, lo - start : hi - start] += sources[:, lo - distance : hi - distance]
+        return total
+
+    def total(self, layouts: Array, until: int | None = None, start: int = 0) -> Array:
+        """Total yields from start to until (exclusive), shaped (batch, resource)"""
+        return self.all_yields(layouts, until=until, start=start).sum(axis=1)  # type: ignore
+
+    def prosperity(self, layouts: Array, until: int | None = None, start: int = 0) -> Array:
+        """Prosperity from start to until (exclusive), shaped (batch,)"""
+        total = self.total(layouts, until=until, start=start)
+        return total[:, [FIELDS.index(_) for _ in ("food", "gold", "tech")]].sum(axis=1)  # type: ignore
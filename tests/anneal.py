@@ -0,0 +1,49 @@
+import contextlib
+import io
+
+from reus import anneal, fishcalc
+from reus.gamedata import *
+from reus.model import World
+from reus.optimizer import optimize
+from reus.util import ReusError
+
+pool = (Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Mackerel, Tuna, Marlin, Dolphin)
+
+# Finds the optimum of small oceans, reporting every improvement
+for size, village in ((None, 5), (6, 4)):
+    reported = []
+    solution = anneal.anneal(
+        pool,
+        size=size,
+        village=village,
+        seconds=None,
+        steps=3000,
+        seed=0,
+        report=lambda _: reported.append(_.prosperity),
+    )
+    assert solution.prosperity == optimize(pool, size=size, village=village).prosperity
+    assert solution.total == World(solution.layout).total(until=village)
+    assert reported == sorted(set(reported)) and reported[-1] == solution.prosperity
+
+# Same seed and steps, same result. Time budgets are honored
+first, second = (anneal.anneal(pool, 5, seconds=None, steps=200, seed=7) for _ in range(2))
+assert (first.layout, first.evaluated) == (second.layout, second.evaluated)
+assert anneal.anneal(pool * 3, 20, village=10, seconds=0.2, seed=1).evaluated > 0
+
+# Same from the command line, with a budget of steps
+argv = "reus-fish-calculator -q --optimize --steps 200 --seed 7 Tuna Tuna Seabass Clown Mack"
+outputs = []
+for _ in range(2):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        fishcalc.cli(argv.split())
+    outputs.append(output.getvalue())
+assert outputs[0] == outputs[1] and "Prosperity" in outputs[0]
+
+for kwargs in ({"size": 0}, {"size": 20}, {"seconds": None}):
+    try:
+        anneal.anneal(pool, **kwargs)
+        assert False, kwargs
+    except ReusError:
+        pass
+
+print("Done!")
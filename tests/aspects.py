@@ -0,0 +1,61 @@
+import itertools
+
+from reus import aspects
+from reus import bounds
+from reus.gamedata import *
+from reus.model import World
+
+# Bonus always, only with enough Natura, or upgraded with it
+assert Aspect.bonus(50) == Yields()
+assert LesserHerd.bonus(2) == Yields() and LesserHerd.bonus(3) == Yields(food=1)
+assert PotentHunt.bonus(6) == Yields(food=1, danger=1)
+assert PotentHunt.bonus(7) == Yields(food=2, danger=1)
+assert GreaterPredator(World([Tuna]).source(0)).yields() == Yields(gold=2, danger=2)
+
+
+def brute_force(world, pool, until, score, natura):
+    """Best score of assigning each aspect to a free slot, or to none"""
+    slots = [s.tile for s in world.sources for _ in range(s.SLOTS)]
+    best = 0
+    for assignment in itertools.product([None, *range(len(slots))], repeat=len(pool)):
+        used = [_ for _ in assignment if _ is not None]
+        if len(used) != len(set(used)):
+            continue
+        bonus = Yields()
+        for aspect, slot in zip(pool, assignment):
+            if slot is None:
+                continue
+            source = world.source(slots[slot])
+            coverage = sum(0 <= _ < until for _ in source.all_yields(relative=False))
+            bonus += aspect.bonus(natura.get(source.tile, 0)) * coverage
+        best = max(best, score(bonus))
+    return best
+
+
+# Dynamic program finds the same best score as trying every assignment
+world = World([Seabass, Clownfish, Parrotfish, Mackerel])
+natura = {0: 8, 2: 3}
+pool = [LesserHerd, PotentHunt, PotentHunt, GreaterPredator, SublimeHerd]
+for until, score in (
+    (4, bounds.prosperity),
+    (2, lambda _: _.food),
+    (3, lambda _: -_.danger),
+    (1, lambda _: _.gold - _.danger),
+):
+    allocation = aspects.allocate(world, pool, until=until, score=score, natura=natura)
+    assert allocation.score == brute_force(world, pool, until, score, natura), until
+    assert score(allocation.bonus) == allocation.score
+    assert all(len(v) <= world.source(k).SLOTS for k, v in allocation.aspects.items())
+    used = [_ for v in allocation.aspects.values() for _ in v]
+    assert all(used.count(_) <= pool.count(_) for _ in used)
+
+# Sources outside the village get nothing, and many slots do not explode
+world = World([Dolphin, Dolphin, BlueWhale, Tuna, Seabass])
+pool = [SublimeHerd, GreaterHunt, PotentPredator, LesserHerd] * 5
+allocation = aspects.allocate(world, pool, until=1, start=0)
+assert all(0 <= k <= 2 for k in allocation.aspects)
+used = [_ for v in allocation.aspects.values() for _ in v]
+assert LesserHerd not in used and len(used) == 15  # Lesser ones require Natura
+assert allocation.states < 10**5
+
+print("Done!")
@@ -0,0 +1,71 @@
+import contextlib
+import io
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from reus import batch, main, notation
+from reus.gamedata import *
+from reus.model import World
+from reus.util import ReusError
+
+# Layout syntax, as in the README
+layout, start, until = notation.parse(
+    "@ Seabass Clown Parrot Tuna Parrot Seabass ] Mack".split()
+)
+assert layout == [Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Seabass, Mackerel]
+assert (start, until) == (0, 6)
+assert notation.parse(["Tuna", "Mack"]) == ([Tuna, Mackerel], None, None)
+for tokens in ("] Tuna @", "@ Tuna @", "Tuna ] ]", "Nemo"):
+    try:
+        notation.parse(tokens.split())
+        assert False, tokens
+    except ReusError:
+        pass
+
+# One JSON line per layout, errors included, comments and blank lines skipped
+lines = io.StringIO(
+    "@ Seabass Clown Parrot Tuna Parrot Seabass ] Mack Tuna Mack\n\n# Hi\nNemo\nTuna @ Tuna\n"
+)
+output = io.StringIO()
+assert batch.run(lines, output, village_range=2) == 3
+first, error, last = map(json.loads, output.getvalue().splitlines())
+assert first["line"] == 1 and first["prosperity"] == 216 and len(first["tiles"]) == 6
+assert first["total"] == {"food": 110, "gold": 70, "tech": 36, "awe": 0, "danger": 0}
+assert error == {"line": 4, "error": "Fish not found: Nemo"}
+assert (last["start"], last["until"]) == (1, 3)
+assert last["prosperity"] == World([Tuna, Tuna]).total(until=3, start=1).prosperity
+
+# Streamed, so even endless input yields results
+endless = itertools.cycle(["Seabass Clown Parrot\n"])
+assert len(list(itertools.islice(batch.results(endless), 1000))) == 1000
+
+# Command line closes the files it opens, but not stdin or stdout
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "layouts.txt")
+    with open(path, "w") as file:
+        file.write("Seabass Clown Parrot\n")
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        main.cli(["reus", path])
+    assert not stdout.closed and json.loads(stdout.getvalue())["prosperity"]
+    stdin, sys.stdin = sys.stdin, io.StringIO("Tuna Mack\n")
+    try:
+        main.cli(["reus", "-o", os.path.join(tmp, "out.jsonl")])
+        assert not sys.stdin.closed
+    finally:
+        sys.stdin = stdin
+
+# Batch mode imports only what evaluating layouts needs, not the calculator's searches
+code = "import sys, reus.batch; print(*sys.modules)"
+result = subprocess.run(
+    [sys.executable, "-c", code], capture_output=True, text=True, check=True
+)
+modules = result.stdout.split()
+assert "reus.notation" in modules
+assert not {"reus.fishcalc", "reus.optimizer", "reus.anneal", "reus.planner"} & set(modules)
+
+print("Done!")
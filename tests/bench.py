@@ -0,0 +1,13 @@
+from reus import bench
+
+# Generated layouts are reproducible
+assert bench.layout(30, "great", seed=1) == bench.layout(30, "great", seed=1)
+assert bench.layout(30, "great", seed=1) != bench.layout(30, "great", seed=2)
+assert len(bench.layout(1000, "late")) == 1000
+
+# One result per benchmark, mix and size
+results = bench.run(sizes=(9, 30), mixes=("early",), repeat=1, min_time=0.001)
+assert len(results) == 2 * len(bench.BENCHMARKS)
+assert all(_["seconds"] > 0 and _["number"] >= 1 for _ in results)
+
+print("Done!")
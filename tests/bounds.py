@@ -0,0 +1,34 @@
+import itertools
+import random
+
+from reus import bounds
+from reus.gamedata import *
+from reus.model import World, subclasses
+
+# Tables cover all fish, and never underestimate any resource
+fish = subclasses(Fish)
+assert set(bounds.table()) == set(fish)
+rng = random.Random(0)
+for _ in range(50):
+    layout = [rng.choice(fish) for _ in range(8)]
+    limits = bounds.table(layout, layout)
+    for source in World(layout).sources:
+        top, reach = limits[type(source)]
+        assert all(map(int.__le__, source.yields, top)), (source, top)
+        assert source.range <= reach
+
+# Partial layouts are never better than their bound, by any score
+pool = (Seabass, Clownfish, Parrotfish, Tuna, Mackerel, Marlin)
+for score in (bounds.prosperity, lambda _: _.food, lambda _: _.tech):
+    limits = bounds.Bounds(pool, village=4, size=5, score=score)
+    for prefix in itertools.permutations(pool, 2):
+        remaining = list(pool)
+        for cls in prefix:
+            remaining.remove(cls)
+        best = max(
+            score(World(prefix + rest).total(until=4))
+            for rest in itertools.permutations(remaining, 3)
+        )
+        assert best <= limits.partial(prefix, remaining), (prefix, best)
+
+print("Done!")
@@ -0,0 +1,55 @@
+import itertools
+
+from reus.constraints import Constraints
+from reus.gamedata import *
+from reus.model import World
+from reus.optimizer import optimize
+from reus.util import ReusError
+
+
+def brute_force(pool, size, village, constraints):
+    totals = [
+        world.total(until=village).prosperity
+        for world in map(World, set(itertools.permutations(pool, size)))
+        if constraints.met(world)
+    ]
+    return max(totals, default=None)
+
+
+# Constrained search finds the same best Prosperity as filtering every permutation
+pool = (Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Mackerel, Anglerfish, Marlin)
+legendary = Constraints(required={Anglerfish: Yields(tech=6)}, minimum={Anglerfish: 1})
+apart = Constraints(maximum={Parrotfish: 1, Marlin: 0})
+apart.forbid(Tuna, Seabass)
+apart.forbid(Clownfish, Clownfish)
+for size, village, constraints in (
+    (7, 5, legendary),
+    (6, 4, Constraints(pinned={0: Mackerel, 3: Parrotfish}, minimum={Tuna: 1})),
+    (6, 3, apart),
+    (5, 5, Constraints(pinned={4: Anglerfish}, required={Tuna: Yields(gold=1)})),
+):
+    best = brute_force(pool, size, village, constraints)
+    solution = optimize(pool, size=size, village=village, constraints=constraints)
+    assert solution.prosperity == best, (constraints, solution.prosperity, best)
+    assert constraints.met(solution.world())
+    assert solution.pruned > 0
+    assert (
+        solution.layout == optimize(pool, size, village, jobs=2, constraints=constraints).layout
+    )
+
+# Constraints that no layout can meet
+for constraints in (
+    Constraints(pinned={9: Tuna}),
+    Constraints(pinned={0: Tuna, 1: Tuna}),
+    Constraints(minimum={Parrotfish: 2}, maximum={Parrotfish: 1}),
+    Constraints(maximum={cls: 0 for cls in pool if cls is not Anglerfish}),
+    Constraints(minimum={Seabass: 1, Clownfish: 1, Tuna: 1}),
+    Constraints(required={Seabass: Yields(awe=100)}, minimum={Seabass: 1}),
+):
+    try:
+        optimize(pool, size=2, village=2, constraints=constraints)
+        assert False, constraints
+    except ReusError:
+        pass
+
+print("Done!")
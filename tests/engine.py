@@ -0,0 +1,57 @@
+from reus.engine import Evaluator
+from reus.gamedata import *
+from reus.model import World
+from reus.util import ReusError
+
+calls = {}
+
+
+def node(engine, name, func, seed=None):
+    def wrapper():
+        calls[name] = calls.get(name, 0) + 1
+        return func()
+
+    return engine.evaluate(name, "value", seed, wrapper)
+
+
+# Acyclic dependencies are evaluated once each
+engine = Evaluator(trace=True)
+a = lambda: node(engine, "a", lambda: b() + c())
+b = lambda: node(engine, "b", lambda: c() * 2)
+c = lambda: node(engine, "c", lambda: 1)
+assert a() == 3 and a() == 3
+assert calls == {"a": 1, "b": 1, "c": 1}
+assert engine.dependencies("a") == {"b", "c"} and engine.dependencies("c") == set()
+
+# Mutual dependencies converge to a fixed point: x = 10 - y // 2, y = x // 2
+engine = Evaluator()
+x = lambda: node(engine, "x", lambda: 10 - y() // 2, seed=int)
+y = lambda: node(engine, "y", lambda: x() // 2, seed=int)
+assert (x(), y()) == (8, 4)
+assert not engine._pending and not engine._estimates
+
+# Cycles without seed are errors
+engine = Evaluator()
+z = lambda: node(engine, "z", lambda: z())
+try:
+    z()
+    assert False
+except ReusError:
+    pass
+assert not engine._stack
+
+# Diverging cycles stop after max_iterations
+engine = Evaluator(max_iterations=5)
+calls.clear()
+w = lambda: node(engine, "w", lambda: w() + 1, seed=int)
+assert w() == 6 and calls["w"] == 6
+
+# Self-referencing fish: Hunted and Legendary Proportions
+world = World([Seabass, Seabass, Marlin, Anglerfish, Seabass, WhiteShark, Marlin, WhiteShark])
+assert world.source(3).yields == Yields(gold=6, tech=12, awe=5)
+assert world.source(5).yields == Yields(food=5, gold=32, danger=8)
+assert world.source(7).yields == Yields(food=5, gold=32, danger=8)
+world.replace(4, Clownfish)
+assert world.source(3).yields == Yields(gold=6, tech=7)
+
+print("Done!")
@@ -0,0 +1,19 @@
+import contextlib
+import io
+
+from reus import fishcalc
+
+
+def run(argv):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        fishcalc.cli(["reus-fish-calculator", *argv.split()])
+    return output.getvalue()
+
+
+# A leading number is the village range, as in the original usage
+assert "range = 4" in run("4")
+assert run("4") == run("--range 4")
+assert run("3 Tuna Clown Parrot") == run("-r 3 Tuna Clown Parrot")
+assert "range = 6" in run("Tuna Clown Parrot")
+
+print("Done!")
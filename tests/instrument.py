@@ -0,0 +1,51 @@
+import os
+
+from reus import instrument, util
+from reus.gamedata import *
+from reus.model import World
+from reus.scheduler import Scheduler
+
+layout = (Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Tuna, Seabass, Mackerel)
+originals = (World.all_yields, Tuna.growing_hunters, vars(Tuna)["yields"])
+
+# Nothing changes while disabled
+World(layout).all_yields()
+assert not instrument.enabled() and not instrument.stats()
+
+instrument.enable()
+world = World(layout)
+world.all_yields()
+tuna = world.source(3)
+assert tuna.yields is tuna.yields
+stats = instrument.stats()
+assert stats["World.all_yields"].calls == 1
+assert stats["Tuna.growing_hunters"].calls == 2  # Once for each Tuna
+assert stats["Tuna.yields"].cached and stats["Tuna.yields"].hits >= 2
+assert not stats["World.tile"].cached
+assert all(_.seconds >= 0 and not _.active for _ in stats.values())
+
+# Disabling restores everything, keeping stats until reset
+instrument.disable()
+assert (World.all_yields, Tuna.growing_hunters, vars(Tuna)["yields"]) == originals
+World(layout).all_yields()
+assert instrument.stats()["World.all_yields"].calls == 1
+instrument.reset()
+assert not instrument.stats()
+
+# Layered evaluation too, each range counted once despite Scheduler calling super()
+instrument.enable()
+Scheduler(World(layout), patch=True).run()
+stats = instrument.stats()
+assert stats["Tuna.yields"].calls > 0
+assert stats["Mackerel.range"].calls == stats["Mackerel.range"].hits + 1
+instrument.disable()
+
+# Environment variable values enabling it
+for values, enabled in ((("1", "Yes", "true "), True), (("0", "false", ""), False)):
+    for value in values:
+        os.environ[instrument.ENVIRON] = value
+        assert util.environ_flag(instrument.ENVIRON) is enabled, value
+        assert util.ArgumentParser().get_default("profile") is enabled, value
+del os.environ[instrument.ENVIRON]
+
+print("Done!")
@@ -0,0 +1,37 @@
+import itertools
+
+from reus import memo
+from reus.gamedata import *
+from reus.model import World
+
+layout = (Seabass, Clownfish, Parrotfish, Tuna, Mackerel, Tuna)
+mirror = layout[::-1]
+
+# Mirrored layouts share a key when the village is mirrored too
+assert memo.canonical(layout, 6)[0] == memo.canonical(mirror, 6)[0]
+assert memo.canonical(layout, 4)[0] != memo.canonical(mirror, 4)[0]
+assert memo.canonical(layout, 4)[0] == memo.canonical(mirror, 6, 2)[0]
+assert memo.canonical(layout, 4)[1] != memo.canonical(mirror, 6, 2)[1]
+
+# Cached villages match World, mirrored ones included, costing a lookup
+cache = memo.LayoutCache()
+for item in itertools.permutations(layout):
+    for start, until in ((0, 6), (0, 4), (1, 5), (-2, 8)):
+        tiles, total = cache.village(item, until, start)
+        world = World(item)
+        assert tiles == [world.tile_yields().get(_, Yields()) for _ in range(start, until)]
+        assert total == world.total(until=until, start=start)
+assert cache.misses + cache.hits == 4 * 720 and cache.hits >= 3 * 360
+
+# Least recently used layouts are evicted
+cache = memo.LayoutCache(maxsize=2)
+cache.total(layout, 4)
+cache.total(mirror, 4)
+cache.total(layout, 4)
+cache.total(layout, 3)
+assert len(cache) == 2 and (cache.hits, cache.misses) == (1, 3)
+cache.total(mirror, 4)
+assert cache.misses == 4
+assert memo.LayoutCache(maxsize=0).total(layout, 4) == World(layout).total(until=4)
+
+print("Done!")
@@ -0,0 +1,41 @@
+import itertools
+
+from reus.gamedata import *
+from reus.model import World
+from reus.optimizer import optimize
+
+
+def brute_force(pool, size, village):
+    return max(
+        Yields.sum(World(layout).all_yields(until=village).values()).prosperity
+        for layout in set(itertools.permutations(pool, size))
+    )
+
+
+# Branch and Bound finds the same best Prosperity as scoring every permutation
+for pool, size, village in (
+    ((Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Mackerel), None, 6),
+    ((Seabass, Clownfish, Parrotfish, Tuna, Tuna, Mackerel, Mackerel), 5, 4),
+    ((Marlin, Seabass, Parrotfish, Dolphin, BlueWhale, Mackerel), 6, 3),
+    ((GreatTuna, GreatParrotfish, SuperiorMackerel, Clownfish, Seabass), 4, 8),
+):
+    solution = optimize(pool, size=size, village=village)
+    assert solution.prosperity == brute_force(pool, size or len(pool), village)
+    assert len(solution.layout) == (size or len(pool))
+    assert all(solution.layout.count(_) <= pool.count(_) for _ in solution.layout)
+
+# Parallel search gives the very same layout as the sequential one
+pool = (Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Mackerel, Tuna)
+solution = optimize(pool, village=5)
+for jobs in (2, 3):
+    parallel = optimize(pool, village=5, jobs=jobs)
+    assert (parallel.layout, parallel.total) == (solution.layout, solution.total)
+
+# Upper bounds never underestimate
+pool = (Seabass, Clownfish, Parrotfish, Tuna, Marlin, Mackerel, Mackerel, Dolphin, BlueWhale)
+for layout in itertools.islice(itertools.permutations(pool), 0, None, 997):
+    for source in World(layout).sources:
+        assert source.yields.prosperity <= type(source).max_yields(pool).prosperity
+        assert getattr(source, "range", 0) <= type(source).max_range(pool)
+
+print("Done!")
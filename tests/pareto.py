@@ -0,0 +1,54 @@
+import itertools
+
+from reus import pareto
+from reus.constraints import Constraints
+from reus.gamedata import *
+from reus.model import World
+from reus.util import ReusError
+
+
+def brute(pool, size, village, objectives, caps, constraints):
+    search = pareto.Pareto(pool, size, village, objectives, caps)
+    vectors = set()
+    for layout in itertools.permutations(pool, size):
+        world = World(layout)
+        total = world.total(until=village)
+        if constraints.met(world) and all(getattr(total, k) <= v for k, v in caps.items()):
+            vectors.add(search.vector(total))
+    return {_ for _ in vectors if not any(pareto.dominates(o, _) for o in vectors)}
+
+
+# Frontier matches brute force, one layout per non-dominated vector
+pool = (Seabass, Clownfish, Parrotfish, Tuna, WhiteShark, Marlin)
+for size, village, objectives, caps, constraints in (
+    (5, 4, pareto.FIELDS, {}, Constraints()),
+    (6, 5, ("food", "danger"), {}, Constraints()),
+    (4, 4, ("gold", "tech", "danger"), {}, Constraints()),
+    (5, 5, ("food", "gold", "tech"), {"danger": 4}, Constraints()),
+    (5, 4, pareto.FIELDS, {}, Constraints(pinned={1: WhiteShark}, maximum={Tuna: 0})),
+):
+    search = pareto.Pareto(pool, size, village, objectives, caps, constraints)
+    solutions = search.frontier()
+    vectors = [search.vector(_.total) for _ in solutions]
+    assert len(set(vectors)) == len(vectors)
+    expected = brute(pool, size, village, objectives, caps, constraints)
+    assert set(vectors) == expected, (size, village)
+    for solution in solutions:
+        assert World(solution.layout).total(until=village) == solution.total
+        assert all(getattr(solution.total, k) <= v for k, v in caps.items())
+        assert constraints.met(solution.world())
+    assert solutions == sorted(solutions, key=lambda _: _.prosperity, reverse=True)
+    assert search.best.pruned > 0
+
+# Dominance is strict
+assert pareto.dominates((2, 1), (1, 1)) and not pareto.dominates((1, 1), (1, 1))
+assert not pareto.dominates((2, 0), (1, 1))
+
+for args in ({"objectives": ()}, {"objectives": ("wealth",)}, {"caps": {"fear": 1}}):
+    try:
+        pareto.Pareto(pool, **args)
+        assert False, args
+    except ReusError:
+        pass
+
+print("Done!")
@@ -0,0 +1,66 @@
+import random
+
+from reus import planet
+from reus.gamedata import *
+from reus.model import World
+from reus.util import ReusError
+
+layout = (Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Tuna, Seabass, Mackerel) * 2
+size = len(layout)
+
+# The planet is the middle copy of a line of 3 copies of it
+world = planet.Planet(layout)
+line = World(layout * 3).tile_yields()
+assert world.tile_yields() == {k: line[k + size] for k in range(size)}
+assert set(world.nearby_sources(world.source(0))) == {world.source(1), world.source(-1)}
+
+# Villages wrap around
+assert world.total(until=3, start=-2) == sum(
+    (world.tile_yields()[_ % size] for _ in range(-2, 3)), Yields()
+)
+assert world.total(until=None, start=None) == world.total(until=size + 5, start=3)
+
+# Incremental updates match a fresh planet
+rng = random.Random(0)
+fishes = [Seabass, Clownfish, Parrotfish, Tuna, Mackerel, Dolphin, GreatMackerel]
+for _ in range(50):
+    world.replace(rng.randrange(-size, 2 * size), rng.choice(fishes))
+    world.swap(rng.randrange(size), rng.randrange(size))
+    fresh = planet.Planet(type(_) for _ in world.sources)
+    assert world.tile_yields() == fresh.tile_yields()
+    assert world.total(until=4, start=-3) == fresh.total(until=4, start=-3)
+    assert world.count(Fish) == size
+    assert world.count(Mackerel) == sum(isinstance(_, Mackerel) for _ in world.sources)
+
+# Ranges larger than the planet reach tiles more than once
+tiny = planet.Planet([Mackerel, Mackerel, Mackerel])
+assert tiny.total(until=None, start=None) == Yields.sum(
+    _.yields * (2 * _.range + 1) for _ in tiny.sources
+)
+assert tiny.source(0).range > len(tiny.sources)
+
+# Biome segments
+world = planet.Planet([Seabass] * 10, biomes=[("ocean", 4), ("forest", 6)])
+assert [world.biome(_) for _ in (0, 3, 4, 9, 10, -1)] == [
+    "ocean",
+    "ocean",
+    "forest",
+    "forest",
+    "ocean",
+    "forest",
+]
+assert world.segment(5) == planet.Segment("forest", 4, 10) and world.segment(5).size == 6
+assert world.biome_total("ocean") == world.total(until=4)
+for biomes in ([("ocean", 4)], [("lava", 10)], [("ocean", 0), ("forest", 10)]):
+    try:
+        planet.Planet([Seabass] * 10, biomes=biomes)
+        assert False, biomes
+    except ReusError:
+        pass
+try:
+    world.insert(0, Seabass)
+    assert False
+except ReusError:
+    pass
+
+print("Done!")
@@ -0,0 +1,45 @@
+import itertools
+
+from reus import planner
+from reus.gamedata import *
+from reus.model import World
+
+# Upgrades follow class names, as some tiers are not subclasses of the previous one
+assert planner.upgrade(Mackerel) is GreatMackerel
+assert planner.upgrade(GreatMackerel) is SuperiorMackerel
+assert planner.upgrade(SuperiorMackerel) is None
+assert planner.upgrade(Anglerfish) is GreatAnglerfish
+assert planner.upgrade(GreatTuna) is None and planner.upgrade(Dolphin) is None
+
+
+def score(layout, order, village):
+    layout = list(layout)
+    total = 0
+    for tile in order:
+        layout[tile] = planner.upgrade(layout[tile])
+        total += World(layout).total(until=village).prosperity
+    return total
+
+
+# Best plan matches all upgrade orders
+layout = (Tuna, Clownfish, Mackerel, Parrotfish)
+tiles = [0, 1, 1, 2, 2, 3, 3]
+for village, steps in ((4, None), (2, None), (4, 3)):
+    result = planner.plan(layout, village=village, steps=steps)
+    best = max(
+        score(layout, order[:steps], village) for order in set(itertools.permutations(tiles))
+    )
+    assert result.prosperity == best == score(layout, result.steps, village)
+    assert len(result.steps) == (steps or len(tiles))
+    assert result.totals == [World(_).total(until=village) for _ in result.layouts()]
+
+# Bounds from each neighbourhood prune most layouts, out of 78732
+layout = (Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Tuna) + (Seabass, Mackerel)
+result = planner.plan(layout + (Seabass, Clownfish, Parrotfish))
+assert result.prosperity == 10803
+assert result.expanded < 500
+
+# Nothing to upgrade
+assert planner.plan([Dolphin, GreatTuna]).steps == []
+
+print("Done!")
@@ -0,0 +1,58 @@
+import contextlib
+import io
+import itertools
+import json
+
+from reus import main, realstate
+
+
+def brute(planet, min_size, max_size, max_oceans):
+    """Most forest and ocean of all multisets of ocean widths fitting a planet"""
+    best = None
+    for num in range(1, max_oceans + 1):
+        for widths in itertools.combinations_with_replacement(
+            range(min_size, max_size + 1), num
+        ):
+            used = sum(realstate.tiles(1, _) for _ in widths)
+            if used <= planet:
+                land = sum(realstate.forest(1, _) for _ in widths)
+                best = max(best or (0, 0), (land, sum(widths)))
+    return best
+
+
+# Every planet size matches an exhaustive search
+for min_size, max_size, max_oceans in ((6, 12, 4), (3, 5, 3), (6, 6, 5)):
+    results = {
+        _["planet"]: _
+        for _ in realstate.solve(
+            130, min_size=min_size, max_size=max_size, max_oceans=max_oceans
+        )
+    }
+    for planet in range(131):
+        best = brute(planet, min_size, max_size, max_oceans)
+        if best is None:
+            assert planet not in results
+            continue
+        result = results[planet]
+        assert (result["forest"], result["ocean"]) == best, (planet, result, best)
+        assert (
+            sum(result["widths"]) == result["ocean"]
+            and len(result["widths"]) == result["oceans"]
+        )
+        assert all(min_size <= _ <= max_size for _ in result["widths"])
+        assert result["tiles"] + result["spare"] == planet and result["spare"] >= 0
+
+# Ocean count limits
+assert all(_["oceans"] == 2 for _ in realstate.solve(200, 52, min_oceans=2, max_oceans=2))
+assert not list(realstate.solve(51, min_oceans=2))
+assert realstate.partition(20, 3) == [7, 7, 6]
+
+# Command line writes to stdout, without closing it
+stdout = io.StringIO()
+with contextlib.redirect_stdout(stdout):
+    main.run(["reus-realstate", "100"])
+    print("still open")
+assert json.loads(stdout.getvalue().splitlines()[0])["planet"] == 100
+assert stdout.getvalue().endswith("still open\n")
+
+print("Done!")
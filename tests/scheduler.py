@@ -0,0 +1,40 @@
+import random
+
+from reus.gamedata import *
+from reus.model import World, subclasses
+from reus.scheduler import Scheduler
+
+rng = random.Random(42)
+species = subclasses(Fish)
+
+# Layered evaluation of what each fish produces matches the on-demand World evaluation
+for size in (1, 3, 8, 15):
+    for _ in range(200):
+        world = World(rng.choice(species) for _ in range(size))
+        layers = Scheduler(world)
+        sources = layers.run()
+        assert list(sources) == world.sources
+        assert all(sources[_] == _.yields for _ in world.sources)
+        assert layers.tiles == world.tile_yields()
+
+# Counting all resources on neighbouring patches, mutual Tuna and Anglerfish included
+world = World([Mackerel, Anglerfish, Tuna, Parrotfish, Anglerfish])
+sources = list(Scheduler(world, patch=True).run().values())
+assert sources[1] == Yields(gold=6, tech=12, awe=5)  # Food of Mackerel and Tuna's patches
+# All Wealth on the Parrotfish patch, including the Anglerfish's. The neighbouring
+# Anglerfish patch is not counted, as Growing Hunters only reads Clown, Parrot and Marlin
+assert sources[2] == Yields(food=15)
+assert world.source(2).yields == Yields(food=9)  # World is not changed
+
+# Sources not reading yields are evaluated in the first layer only, readers in all
+calls = []
+predator, growing_hunters = Seabass.predator, Tuna.growing_hunters
+Seabass.predator = lambda self: calls.append(Seabass) or predator(self)
+Tuna.growing_hunters = lambda self: calls.append(Tuna) or growing_hunters(self)
+world = World([Seabass, Tuna, Clownfish])
+sources = Scheduler(world).run()
+Seabass.predator, Tuna.growing_hunters = predator, growing_hunters
+assert calls.count(Seabass) == 1 and calls.count(Tuna) == 5
+assert all(sources[_] == _.yields for _ in world.sources)
+
+print("Done!")
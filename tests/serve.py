@@ -0,0 +1,76 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+
+from reus import batch
+from reus import notation
+from reus import optimizer
+from reus import serve
+from reus.gamedata import *
+
+
+async def main(path):
+    with serve.Server(jobs=2) as server:
+        listening = await server.start(path)
+        async with listening:
+            reader, writer = await asyncio.open_unix_connection(path)
+
+            async def request(**message):
+                writer.write(json.dumps(message).encode() + b"\n")
+                await writer.drain()
+                return json.loads(await reader.readline())
+
+            # Evaluations match batch mode, and repeated ones are cached
+            layout = "@ Seabass Clown Parrot Tuna ] Mack"
+            expected = batch.evaluate(*notation.parse(layout.split())[::2], start=0)
+            for _ in range(2):
+                response = await request(id=1, op="evaluate", layout=layout)
+                assert response == {"id": 1, "result": expected}, response
+            stats = (await request(op="stats"))["result"]
+            assert (stats["hits"], stats["misses"], stats["requests"]) == (1, 1, 3)
+
+            # Optimization matches the optimizer, evaluating its best layout
+            fish = [Seabass, Seabass, Clownfish, Tuna, Mackerel]
+            best = optimizer.optimize(fish, size=4, village=4)
+            response = await request(
+                op="optimize", fish=[_.__name__ for _ in fish], size=4, range=4
+            )
+            assert response["result"]["prosperity"] == best.prosperity
+            assert response == await request(
+                op="optimize", fish="Mack Tuna Clown Sea Sea", size=4, range=4
+            )
+            assert (await request(op="stats"))["result"]["searches"] == 1
+
+            response = await request(op="evaluate", layout="Tuna Seabass", range=1)
+            assert response["result"]["until"] == 1, response
+
+            # Errors are reported, and the connection stays open
+            for message in (
+                {"op": "evaluate", "layout": "Nemo"},
+                {"op": "fly"},
+                {"op": "evaluate"},
+                {"op": "evaluate", "layout": "Tuna Seabass", "range": 0},
+                {"op": "evaluate", "layout": "Tuna Seabass", "range": -2},
+                {"op": "optimize", "fish": "Tuna Seabass", "range": -1},
+            ):
+                assert "error" in await request(**message)
+            server.stats = lambda: 1 / 0  # Unexpected errors too
+            logging.disable()
+            assert "ZeroDivisionError" in (await request(op="stats"))["error"]
+            logging.disable(logging.NOTSET)
+            del server.stats
+            writer.write(b"not json\n")
+            assert "error" in json.loads(await reader.readline())
+            assert "result" in await request(op="stats")
+
+            writer.close()
+            await writer.wait_closed()
+            await asyncio.sleep(0.1)  # Let the server close it too
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    asyncio.run(main(os.path.join(tmp, "reus.sock")))
+
+print("Done!")
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+# Import time budget of commands run often from scripts, in microseconds, for reus modules
+# only: standard library ones, such as logging and argparse, are needed anyway.
+BUDGET = 20_000
+COMMANDS = {
+    "reus-realstate": ["reus-realstate", "100", "-o", "/dev/null"],
+    "--version": ["reus", "--version"],
+}
+SLOW = ("reus.gamedata", "reus.model", "typing_extensions")
+
+
+def importtime(argv):
+    """Self time of each module imported by a command, from python -X importtime"""
+    code = f"from reus import main; main.run({argv!r})"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_time, _, name = line.split(":", 1)[1].split("|")
+            if self_time.strip().isdigit():
+                modules[name.strip()] = int(self_time)
+    return modules
+
+
+for command, argv in COMMANDS.items():
+    modules = importtime(argv)
+    assert "reus.main" in modules, command
+    slow = [_ for _ in SLOW if _ in modules]
+    assert not slow, f"{command} imports {slow}"
+    spent = sum(v for k, v in modules.items() if k.split(".")[0] == "reus")
+    assert spent < BUDGET, f"{command} spent {spent}us importing reus"
+
+# Entry points are resolved by name, importing their modules only then
+from reus import main, memo
+
+assert main.entry_point("reus-fish-calculator").__module__ == "reus.fishcalc"
+assert main.entry_point("python3") is main.cli
+assert main.CACHE_SIZE == memo.MAXSIZE
+
+print("Done!")
@@ -0,0 +1,54 @@
+import io
+import json
+import os
+import tempfile
+
+from reus import batch, memo, optimizer
+from reus.gamedata import *
+from reus.model import World
+from reus.store import Store, signature
+
+layout = [Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Tuna, Seabass, Mackerel]
+assert signature(layout) == signature(layout[::-1])
+assert signature(layout) == "Clownfish=1 Mackerel=1 Parrotfish=2 Seabass=2 Tuna=2"
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "reus.db")
+
+    # Evaluated villages persist, and are found for mirrored layouts too
+    with Store(path) as store:
+        cache = memo.LayoutCache(store=store)
+        tiles, total = cache.village(layout, 6)
+        assert cache.misses == 1 and len(store) == 1
+    with Store(path) as store:
+        cache = memo.LayoutCache(store=store)
+        assert cache.village(layout, 6) == (tiles, total)
+        assert cache.village(layout[::-1], 8, 2) == (tiles[::-1], total)
+        assert cache.misses == 0 and cache.loaded == 1
+        assert store.village(layout, 6, patch=True) is None
+
+        # Best known layout by species counts and village
+        assert store.best(layout[::-1], 6) == (layout, total)
+        assert store.best(layout, 8, 2) == (layout[::-1], total)
+        assert store.best(layout, 5) is None
+
+    # Optimizer searches are saved, and answered from the store
+    pool = [Seabass, Seabass, Clownfish, Parrotfish, Tuna, Mackerel]
+    with Store(path) as store:
+        solution = optimizer.optimize(pool, village=4, store=store)
+        assert solution.evaluated
+    with Store(path) as store:
+        known = optimizer.optimize(pool, village=4, store=store)
+        assert not known.evaluated
+        assert (known.layout, known.total) == (solution.layout, solution.total)
+        assert store.best(pool, 4) == (list(solution.layout), solution.total)
+
+    # Batch mode skips stored layouts
+    with Store(path) as store:
+        lines = io.StringIO(" ".join(_.__name__ for _ in layout) + "\n")
+        output = io.StringIO()
+        batch.run(lines, output, cache_size=0, store=store)
+        result = json.loads(output.getvalue())
+        assert result["prosperity"] == World(layout).total(until=6).prosperity
+
+print("Done!")
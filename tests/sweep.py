@@ -0,0 +1,35 @@
+import random
+
+from reus import memo
+from reus import sweep
+from reus.gamedata import *
+from reus.model import World
+
+layout = (Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Tuna, Seabass, Mackerel)
+
+# Every village total matches World, including tiles outside the ocean
+world = World(layout)
+totals = sweep.Sweep(world)
+for start in range(-3, 12):
+    for until in range(start - 1, 13):
+        assert totals.total(until, start) == world.total(until=until, start=start)
+
+# Patch mode matches its own village evaluation
+for item in (layout, [random.Random(seed).choice(layout) for seed in range(10)]):
+    totals = sweep.Sweep(World(item), patch=True)
+    for start, village in totals.totals(ranges=(3, 6), starts=range(-1, 4)):
+        tiles = memo.village(item, until=start + village, start=start, patch=True)
+        assert totals.total(start + village, start) == Yields.sum(tiles)
+
+# Best start of each range is the one with the highest Prosperity
+totals = sweep.Sweep(world)
+best = totals.best()
+assert sorted(best) == list(range(1, totals.last - totals.first + 1))
+for village, (start, total) in best.items():
+    assert total.prosperity == max(
+        world.total(until=_ + village, start=_).prosperity
+        for _ in range(totals.first, totals.last - village + 1)
+    )
+assert sweep.Sweep(World([])).totals() == {}
+
+print("Done!")
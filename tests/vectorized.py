@@ -0,0 +1,27 @@
+import itertools
+import random
+
+from reus.gamedata import *
+from reus.model import World, subclasses
+from reus.vectorized import BatchEvaluator
+
+species = subclasses(Fish)
+engine = BatchEvaluator(species)
+rng = random.Random(42)
+
+# Batch yields on every tile match the reference World, including outside the ocean
+for size in (1, 2, 5, 12):
+    layouts = [[rng.choice(species) for _ in range(size)] for _ in range(200)]
+    batch = engine.all_yields(engine.encode(layouts), until=size + 4, start=-4)
+    for layout, tiles in zip(layouts, batch):
+        reference = World(layout).all_yields(until=size + 4, start=-4)
+        for tile, yields in enumerate(tiles.tolist(), -4):
+            assert tuple(reference.get(tile, Yields())) == tuple(yields)
+
+# Prosperity of a village
+layouts = list(itertools.permutations((Seabass, Clownfish, Parrotfish, Tuna, Mackerel, Tuna)))
+for layout, prosperity in zip(layouts, engine.prosperity(engine.encode(layouts), until=4)):
+    assert World(layout).total(until=4).prosperity == prosperity
+assert engine.decode(engine.encode(layouts)) == layouts
+
+print("Done!")
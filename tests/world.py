@@ -0,0 +1,64 @@
+from reus.gamedata import *
+from reus.model import World
+
+layout = (Seabass, Clownfish, Parrotfish, Tuna, Parrotfish, Tuna, Seabass, Mackerel)
+
+
+def fresh(world):
+    return World(type(_) for _ in world.sources).all_yields()
+
+
+def fresh_all(world):
+    return World(type(_) for _ in world.sources).all_yields(start=None)
+
+
+# Evaluations are cached until the layout changes
+world = World(layout)
+assert world.all_yields() == fresh(world)
+tuna = world.source(3)
+assert tuna.yields is tuna.yields
+assert world.version == 0
+
+# Every layout change invalidates the cache
+world.swap(0, 3)
+assert world.version == 1
+assert world.all_yields() == fresh(world)
+assert world.source(0) is tuna and world.tile(tuna) == 0
+
+old = world.replace(1, Mackerel)
+assert isinstance(old, Clownfish) and old.world is None
+assert world.all_yields() == fresh(world)
+
+world.insert(2, Clownfish)
+assert len(world.sources) == len(layout) + 1
+assert world.all_yields() == fresh(world)
+
+assert isinstance(world.remove(0), Tuna)
+assert world.all_yields() == fresh(world)
+assert world.version == 4
+
+# Tiles are indexed, and the index follows every layout change
+world.insert(-1, Dolphin)
+world.insert(100, BlueWhale)
+world.swap(-1, 1)
+world.replace(-2, GreatTuna)
+world.remove(-3)
+assert [world.tile(_) for _ in world.sources] == list(range(len(world.sources)))
+world.sources.reverse()
+world.invalidate()
+assert [world.tile(_) for _ in world.sources] == list(range(len(world.sources)))
+
+# Replacing and swapping update only the affected tiles, and the totals
+world = World(layout * 3)
+assert world.total(until=6) == Yields.sum(world.all_yields(until=6).values())
+for tile, item in ((0, Mackerel), (5, Dolphin), (23, BlueWhale), (-1, Clownfish)):
+    tiles, total = world.update({tile: item}, until=6)
+    assert world.all_yields(start=None) == fresh_all(world)
+    assert total == Yields.sum(world.all_yields(until=6).values())
+    assert all(tile < 6 for tile in tiles)
+world.swap(1, 10)
+world.swap(22, 2)
+assert world.all_yields(start=None) == fresh_all(world)
+assert world.total() == Yields.sum(fresh(world).values())
+
+print("Done!")